@@ -0,0 +1,199 @@
+"""
+This is a Python (2.7) implementation of the CYK algorithm.
+
+Author: Wes Rupert
+"""
+
+from cfgtocnf import ALPHABET, BINARIZE_FIRST, EPS, Grammar, cfgtocnf
+
+class Recognizer:
+    """
+    Recognizes strings in the language of a grammar in Chomsky Normal Form.
+
+    Each chart cell is a bitmask of the nonterminals deriving its substring.
+    The binary rules A -> BC are grouped by B and then by A, into pairs of
+    the mask of every such C and A's bit. Combining two cells takes, for
+    each B in the left cell, one AND with the right cell per group, so the
+    work per split point is bounded by the number of rules. A B is skipped
+    if the right cell has none of its C's or every A it makes is already
+    found, and a cell stops splitting once it holds every left side. The
+    groups are built once and shared by every string recognized.
+
+    Fields: grammar, start, bits
+    """
+    def __init__(self, grammar, start = 'S'):
+        self.grammar = grammar
+        nonterminals = set()
+        for statement in grammar.statements:
+            nonterminals.add(statement.left)
+            nonterminals.update(char for char in statement.right if char >= 0)
+        self._nonterminals = sorted(nonterminals)
+        self.bits = dict((symbol, bit) \
+                for bit, symbol in enumerate(self._nonterminals))
+        start = grammar.symbols.ids.get(start)
+        self.start = 1 << self.bits[start] if start in self.bits else 0
+        self._terminals = {}
+        self._binary = {}
+        groups = [{} for _ in self._nonterminals]
+        for statement in grammar.statements:
+            bit = self.bits[statement.left]
+            right = statement.right
+            if len(right) == 1 and right[0] < 0:
+                self._terminals[right[0]] = \
+                        self._terminals.get(right[0], 0) | 1 << bit
+            elif len(right) == 2 and min(right) >= 0:
+                first, second = self.bits[right[0]], self.bits[right[1]]
+                self._binary.setdefault(bit, []).append((first, second))
+                groups[first][bit] = groups[first].get(bit, 0) | 1 << second
+            else:
+                raise ValueError('Not in Chomsky Normal Form: ' + \
+                        statement.format(grammar.symbols))
+        self._by_first = []
+        self._full = 0
+        for group in groups:
+            pairs = [(mask, 1 << bit) for bit, mask \
+                    in sorted(group.iteritems())]
+            seconds = lefts = 0
+            for mask, abit in pairs:
+                seconds |= mask
+                lefts |= abit
+            self._by_first.append((seconds, lefts, pairs))
+            self._full |= lefts
+
+    def _bits(self, mask):
+        """
+        Returns the bits set in a mask, lowest first.
+        """
+        bits = []
+        while mask:
+            low = mask & -mask
+            bits.append(low.bit_length() - 1)
+            mask ^= low
+        return bits
+
+    def _chart(self, tokens):
+        """
+        Fills the chart for the tokens. Cell chart[i][j] holds the mask of
+        the nonterminals deriving tokens i up to j.
+        """
+        size = len(tokens)
+        by_first = self._by_first
+        full = self._full
+        chart = [[0] * (size + 1) for _ in range(size)]
+        firsts = [[()] * (size + 1) for _ in range(size)]
+        for i, token in enumerate(tokens):
+            chart[i][i + 1] = self._terminals.get(token, 0)
+            firsts[i][i + 1] = [by_first[bit] \
+                    for bit in self._bits(chart[i][i + 1]) if by_first[bit][2]]
+        for length in range(2, size + 1):
+            for i in range(size - length + 1):
+                j = i + length
+                mask = 0
+                for k in range(i + 1, j):
+                    if mask == full:
+                        break
+                    right = chart[k][j]
+                    if not right:
+                        continue
+                    for seconds, lefts, pairs in firsts[i][k]:
+                        if not right & seconds or not lefts & ~mask:
+                            continue
+                        for cmask, abit in pairs:
+                            if right & cmask and not mask & abit:
+                                mask |= abit
+                chart[i][j] = mask
+                firsts[i][j] = [by_first[bit] \
+                        for bit in self._bits(mask) if by_first[bit][2]]
+        return chart
+
+    def recognize(self, string):
+        """
+        Returns whether the grammar derives the string, or sequence of
+        terminal names, from the start symbol.
+        """
+        tokens = self.grammar.symbols.tokenize(string)
+        if not tokens or None in tokens:
+            return False
+        return bool(self._chart(tokens)[0][len(tokens)] & self.start)
+
+    def recognize_all(self, strings):
+        """
+        Returns whether the grammar derives each of the strings. Repeated
+        strings are only recognized once.
+        """
+        seen = {}
+        results = []
+        for string in strings:
+            key = string if isinstance(string, basestring) else tuple(string)
+            if key not in seen:
+                seen[key] = self.recognize(string)
+            results.append(seen[key])
+        return results
+
+    def parse(self, string):
+        """
+        Returns a parse tree of the string, or None if it is not derived.
+
+        A tree is a tuple of a nonterminal's name and its two subtrees, or
+        of its name and a terminal's name at the leaves. It is built with an
+        explicit stack, so deep trees do not hit the recursion limit.
+        """
+        symbols = self.grammar.symbols
+        tokens = symbols.tokenize(string)
+        if not tokens or None in tokens:
+            return None
+        chart = self._chart(tokens)
+        mask = chart[0][len(tokens)] & self.start
+        if not mask:
+            return None
+
+        def split(bit, i, j):
+            """
+            Returns the first binary rule and split point that derive
+            tokens i up to j from the nonterminal bit.
+            """
+            for first, second in self._binary.get(bit, ()):
+                for k in range(i + 1, j):
+                    if chart[i][k] >> first & 1 and chart[k][j] >> second & 1:
+                        return first, second, k
+
+        stack = [(mask.bit_length() - 1, 0, len(tokens), False)]
+        built = []
+        while stack:
+            bit, i, j, done = stack.pop()
+            name = symbols.name(self._nonterminals[bit])
+            if done:
+                second = built.pop()
+                built.append((name, built.pop(), second))
+            elif j == i + 1 and self._terminals.get(tokens[i], 0) >> bit & 1:
+                built.append((name, symbols.name(tokens[i])))
+            else:
+                first, second, k = split(bit, i, j)
+                stack.append((bit, i, j, True))
+                stack.append((second, k, j, False))
+                stack.append((first, i, k, False))
+        return built[0]
+
+def main():
+    """
+    The main function. Converts a sample CFG and recognizes a few strings.
+    """
+    grammar = Grammar('Example', ALPHABET, \
+            ('S', 'aA'), \
+            ('A', 'B'), \
+            ('A', 'CDCD'), \
+            ('B', EPS), \
+            ('B', 'a'), \
+            ('C', 'BDD'), \
+            ('D', 'b'), \
+            ('D', EPS))
+    cfgtocnf(grammar, order = BINARIZE_FIRST, shared = True)
+    print 'Recognizing with the following. ' + str(grammar)
+    recognizer = Recognizer(grammar)
+    strings = ['a', 'aa', 'ab', 'abb', 'aabbb', 'ba', 'ac']
+    for string, accepted in zip(strings, recognizer.recognize_all(strings)):
+        print '%-7s %s' % (repr(string), accepted)
+    print 'Parse of \'abb\': %s' % (recognizer.parse('abb'),)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+This is a Python (2.7) implementation of the Earley parsing algorithm.
+
+Author: Wes Rupert
+"""
+
+from cfgtocnf import ALPHABET, EPS, Grammar
+
+class ForestNode:
+    """
+    A node of a shared packed parse forest.
+
+    A symbol node covers a symbol's derivations of the tokens from start up
+    to end, and is labelled with the symbol's name. An intermediate node
+    covers a prefix of one statement's right side, and is labelled with the
+    statement up to a dot. Each family is one way of deriving the span, as
+    the statement used and a tuple of child nodes; a terminal has none.
+    Nodes are shared, so an ambiguous string gets one node per span rather
+    than one tree per derivation.
+
+    Fields: label, start, end, symbol, families
+    """
+    def __init__(self, label, start, end, symbol):
+        self.label = label
+        self.start = start
+        self.end = end
+        self.symbol = symbol
+        self.families = []
+
+    def __str__(self):
+        return "%s[%d:%d]" % (self.label, self.start, self.end)
+
+class _Column:
+    """
+    The Earley items ending at one position of the input.
+
+    Items are (statement, dot, origin). Fields: items, agenda, waiting,
+    predicted, completed, links
+    """
+    def __init__(self):
+        self.items = set()
+        self.agenda = []
+        self.waiting = {}
+        self.predicted = set()
+        self.completed = {}
+        self.links = {}
+
+    def add(self, item, link = None):
+        """
+        Adds the item, recording the position its last symbol started at.
+        """
+        if link is not None:
+            self.links.setdefault(item, set()).add(link)
+        if item not in self.items:
+            self.items.add(item)
+            self.agenda.append(item)
+
+class Parser:
+    """
+    Parses strings with any context-free grammar, as given, with no need to
+    convert it to a normal form first.
+
+    Predictions are looked up by nonterminal in the grammar's index. The
+    Aycock-Horspool fix moves the dot over a nullable nonterminal as it is
+    predicted, so epsilon statements need no special completion pass.
+
+    Fields: grammar, start
+    """
+    def __init__(self, grammar, start = 'S'):
+        self.grammar = grammar
+        self.start = start
+
+    def _chart(self, tokens):
+        """
+        Returns the columns of Earley items for the tokens.
+        """
+        grammar = self.grammar
+        nullable = grammar.nullable()
+        columns = [_Column() for _ in range(len(tokens) + 1)]
+        start = grammar.symbols.ids.get(self.start)
+        if start is not None and start >= 0:
+            columns[0].predicted.add(start)
+            for statement in grammar.productions(start):
+                columns[0].add((statement, 0, 0))
+        for j, column in enumerate(columns):
+            while column.agenda:
+                item = column.agenda.pop()
+                statement, dot, origin = item
+                if dot == len(statement.right):
+                    column.completed.setdefault((statement.left, origin), \
+                            []).append(statement)
+                    for waiter in columns[origin].waiting.get( \
+                            statement.left, ()):
+                        column.add((waiter[0], waiter[1] + 1, waiter[2]), \
+                                origin)
+                    continue
+                symbol = statement.right[dot]
+                column.waiting.setdefault(symbol, []).append(item)
+                if symbol < 0:
+                    continue
+                if symbol not in column.predicted:
+                    column.predicted.add(symbol)
+                    for production in grammar.productions(symbol):
+                        column.add((production, 0, j))
+                if symbol in nullable:
+                    column.add((statement, dot + 1, origin), j)
+            if j < len(tokens):
+                for waiter in column.waiting.get(tokens[j], ()):
+                    columns[j + 1].add((waiter[0], waiter[1] + 1, \
+                            waiter[2]), j)
+        return columns
+
+    def recognize(self, string):
+        """
+        Returns whether the grammar derives the string, or sequence of
+        terminal names, from the start symbol.
+        """
+        tokens = self.grammar.symbols.tokenize(string)
+        if None in tokens:
+            return False
+        start = self.grammar.symbols.ids.get(self.start)
+        return (start, 0) in self._chart(tokens)[-1].completed
+
+    def parse(self, string):
+        """
+        Returns the root of the parse forest of the string, or None if it is
+        not derived.
+        """
+        symbols = self.grammar.symbols
+        tokens = symbols.tokenize(string)
+        if None in tokens:
+            return None
+        columns = self._chart(tokens)
+        start = symbols.ids.get(self.start)
+        if (start, 0) not in columns[-1].completed:
+            return None
+        nodes = {}
+        stack = []
+
+        def node(key):
+            """
+            Returns the forest node for a key, creating it if new.
+
+            A key is (symbol, start, end) or (statement, dot, start, end).
+            """
+            if key not in nodes:
+                if len(key) == 3:
+                    nodes[key] = ForestNode(symbols.name(key[0]), key[1], \
+                            key[2], True)
+                else:
+                    nodes[key] = ForestNode('%s -> %s.' % ( \
+                            symbols.name(key[0].left), \
+                            symbols.format(key[0].right[:key[1]])), \
+                            key[2], key[3], False)
+                stack.append(key)
+            return nodes[key]
+
+        def families(statement, dot, i, j):
+            """
+            Returns the children of each way the statement's first dot
+            symbols derive tokens i up to j.
+            """
+            if dot == 0:
+                return [()]
+            found = []
+            for k in columns[j].links.get((statement, dot, i), ()):
+                last = node((statement.right[dot - 1], k, j))
+                if dot == 1:
+                    found.append((last,))
+                else:
+                    found.append((node((statement, dot - 1, i, k)), last))
+            return found
+
+        root = node((start, 0, len(tokens)))
+        while stack:
+            key = stack.pop()
+            current = nodes[key]
+            if len(key) == 4:
+                statement, dot, i, j = key
+                current.families = [(statement, children) for children \
+                        in families(statement, dot, i, j)]
+            elif key[0] >= 0:
+                symbol, i, j = key
+                for statement in columns[j].completed.get((symbol, i), ()):
+                    current.families.extend((statement, children) \
+                            for children in families(statement, \
+                            len(statement.right), i, j))
+        return root
+
+def tree(node):
+    """
+    Returns one parse tree from a forest, as nested tuples of a symbol's
+    name and its subtrees, with terminal names at the leaves. Cyclic
+    derivations are skipped; returns None if there are no others.
+
+    The forest is searched depth first with an explicit stack, so deep
+    trees do not hit the recursion limit. Each frame holds a node, the
+    family being tried, the next child and the subtrees built so far, and
+    intermediate nodes hand their subtrees up flattened.
+    """
+    if node.symbol and not node.families:
+        return node.label
+    visiting = set([id(node)])
+    stack = [[node, 0, 0, []]]
+    returned = found = None
+    while stack:
+        frame = stack[-1]
+        current, family, child, parts = frame
+        if found is not None:
+            found = None
+            if returned is None:
+                frame[1:] = [family + 1, 0, []]
+            elif current.families[family][1][child].symbol:
+                parts.append(returned)
+                frame[2] += 1
+            else:
+                parts.extend(returned)
+                frame[2] += 1
+            continue
+        if family == len(current.families):
+            stack.pop()
+            visiting.discard(id(current))
+            returned, found = None, True
+            continue
+        children = current.families[family][1]
+        if child == len(children):
+            stack.pop()
+            visiting.discard(id(current))
+            if current.symbol:
+                returned = (current.label,) + tuple(parts)
+            else:
+                returned = parts
+            found = True
+            continue
+        sub = children[child]
+        if sub.symbol and not sub.families:
+            parts.append(sub.label)
+            frame[2] += 1
+        elif id(sub) in visiting:
+            frame[1:] = [family + 1, 0, []]
+        else:
+            visiting.add(id(sub))
+            stack.append([sub, 0, 0, []])
+    return returned
+
+def main():
+    """
+    The main function. Parses strings with a sample CFG and an ambiguous
+    one, without converting them.
+    """
+    grammar = Grammar('Example', ALPHABET, \
+            ('S', 'aA'), \
+            ('A', 'B'), \
+            ('A', 'CDCD'), \
+            ('B', EPS), \
+            ('B', 'a'), \
+            ('C', 'BDD'), \
+            ('D', 'b'), \
+            ('D', EPS))
+    print 'Parsing with the following. ' + str(grammar)
+    parser = Parser(grammar)
+    for string in ['a', 'aa', 'ab', 'abb', 'aabbb', 'ba', 'ac']:
+        print '%-7s %s' % (repr(string), parser.recognize(string))
+    print 'Parse of \'abb\': %s' % (tree(parser.parse('abb')),)
+    sums = Grammar('Sums', ('a', 'p'), ('S', 'SpS'), ('S', 'a'))
+    print ''
+    print 'Parsing with the following. ' + str(sums)
+    root = Parser(sums).parse('apapapa')
+    print 'The root of \'apapapa\' has %d families.' % len(root.families)
+    print 'One of its trees: %s' % (tree(root),)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+This is a Python (2.7) implementation of a text grammar file format.
+
+A file holds one rule per line, as a left side, '->', and alternatives
+separated by '|':
+    expr -> term "+" expr | term
+    term -> 'x' | -
+Symbols are separated by whitespace and may be several characters long.
+Quoted symbols are terminals and the others nonterminals, so no name may be
+both. A lone '-' stands for the empty string. Blank lines and lines
+starting with '#' are skipped.
+
+Author: Wes Rupert
+"""
+
+import os
+import tempfile
+
+from cfgtocnf import BINARIZE_FIRST, EPS, Grammar, cfgtocnf
+
+ARROW = '->'
+BAR = '|'
+COMMENT = '#'
+QUOTES = '\'"'
+
+def read_rules(lines):
+    """
+    Yields each rule in the lines, one line at a time, as the left side and
+    a tuple of (name, terminal) pairs for each alternative's right side.
+    """
+    for number, line in enumerate(lines, 1):
+        words = line.split()
+        if not words or words[0].startswith(COMMENT):
+            continue
+        if len(words) < 2 or words[1] != ARROW or words[0][0] in QUOTES:
+            raise ValueError('Line %d: expected a nonterminal and %s' % ( \
+                    number, ARROW))
+        right = []
+        for word in words[2:] + [BAR]:
+            if word == BAR:
+                yield words[0], tuple(right)
+                right = []
+            elif word == EPS:
+                continue
+            elif word[0] in QUOTES:
+                if len(word) < 3 or word[-1] != word[0]:
+                    raise ValueError('Line %d: bad terminal %s' % ( \
+                            number, word))
+                right.append((word[1:-1], True))
+            else:
+                right.append((word, False))
+
+def load(path, grammar_type = Grammar, name = None):
+    """
+    Reads a grammar from the file, a line at a time, into a new grammar of
+    the given type, named after the file by default.
+    """
+    if name is None:
+        name = os.path.splitext(os.path.basename(path))[0]
+    grammar = grammar_type(name, ())
+    symbols = grammar.symbols
+    alphabet = []
+    with open(path) as handle:
+        for left, right in read_rules(handle):
+            for symbol, terminal in ((left, False),) + right:
+                known = symbols.ids.get(symbol)
+                if known is None:
+                    if terminal:
+                        symbols.terminal(symbol)
+                        alphabet.append(symbol)
+                    else:
+                        symbols.nonterminal(symbol)
+                elif (known < 0) != terminal:
+                    raise ValueError('%s is both a terminal and a ' \
+                            'nonterminal' % symbol)
+            grammar.add(left, [symbol for symbol, _ in right])
+    grammar.alphabet = tuple(alphabet)
+    return grammar
+
+def main():
+    """
+    The main function. Writes a sample grammar file, then loads and converts
+    it, and loads one with a quoted '-' terminal.
+    """
+    path = os.path.join(tempfile.gettempdir(), 'sample.cfg')
+    with open(path, 'w') as handle:
+        handle.write('# Sums of terms\n')
+        handle.write('expr -> term "+" expr | term\n')
+        handle.write('term -> "x" | "(" expr ")" | -\n')
+    grammar = load(path)
+    print 'Loaded the following from %s. %s' % (path, grammar)
+    cfgtocnf(grammar, order = BINARIZE_FIRST, shared = True)
+    print 'Converted to CNF. ' + str(grammar)
+    with open(path, 'w') as handle:
+        handle.write('# A quoted - is a terminal, not the empty string\n')
+        handle.write('range -> "a" "-" "b" | "a"\n')
+    print 'Loaded the following from %s. %s' % (path, load(path))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+This is a Python (2.7) implementation of LL(1) predictive parsing.
+
+Author: Wes Rupert
+"""
+
+from cfgtopda import ALPHABET, EPS, Grammar, PDAStatement
+
+END = '$'
+
+def main():
+    """
+    The main function. Builds predictive tables for two sample CFGs, and
+    parses a few strings with the LL(1) one.
+    """
+    grammar = Grammar('Lists', ALPHABET, 'S', \
+            ('S', 'aL'),  \
+            ('L', 'xaL'), \
+            ('L', EPS))
+    parser = LL1Parser(grammar)
+    print 'Predicting with the following. ' + str(grammar)
+    print parser
+    for string in ['a', 'axa', 'axaxa', 'ax', 'aa', '']:
+        print '%-7s %s' % (repr(string), parser.accepts(string))
+    grammar = Grammar('Example', ALPHABET, 'S', \
+            ('S', 'aA'),   \
+            ('A', 'B'),    \
+            ('A', 'CDCD'), \
+            ('B', EPS),    \
+            ('B', 'a'),    \
+            ('C', 'BDD'),  \
+            ('D', 'b'),    \
+            ('D', EPS))
+    print ''
+    print 'Predicting with the following. ' + str(grammar)
+    print LL1Parser(grammar)
+
+class LL1Parser:
+    """
+    A deterministic parser for an LL(1) grammar.
+
+    The table maps each (nonterminal, lookahead) to the single expansion
+    statement of the grammar's PDA to take, so the PDA never has to guess.
+    Every other cell rejects. If more than one statement fits a cell, the
+    grammar is not LL(1), and the cell is listed in conflicts.
+
+    Fields: grammar, nullable, first, follow, table, conflicts
+    """
+    def __init__(self, grammar):
+        self.grammar = grammar
+        self.nullable, self.first = first_sets(grammar)
+        self.follow = follow_sets(grammar, self.nullable, self.first)
+        self.table = {}
+        self.conflicts = {}
+        for statement in sorted(grammar.statements, key = str):
+            symbols = _symbols(statement.right)
+            lookaheads = _first_of(symbols, self.nullable, self.first)
+            if all(char in self.nullable for char in symbols):
+                lookaheads |= self.follow[statement.left]
+            expansion = PDAStatement('q', EPS, statement.left, 'q', \
+                    statement.right)
+            for lookahead in lookaheads:
+                key = (statement.left, lookahead)
+                if key in self.conflicts:
+                    self.conflicts[key].append(expansion)
+                elif key in self.table:
+                    self.conflicts[key] = [self.table[key], expansion]
+                else:
+                    self.table[key] = expansion
+
+    def is_ll1(self):
+        """
+        Returns whether the table has no conflicts.
+        """
+        return not self.conflicts
+
+    def accepts(self, string):
+        """
+        Returns whether the grammar derives the string, in one pass over it
+        with no backtracking.
+        """
+        if self.conflicts:
+            raise ValueError('Grammar %s is not LL(1).' % self.grammar.name)
+        table = self.table
+        nonterminals = self.first
+        stack = [END, self.grammar.start]
+        position = 0
+        lookahead = string[0] if string else END
+        while stack:
+            top = stack.pop()
+            if top in nonterminals:
+                expansion = table.get((top, lookahead))
+                if expansion is None:
+                    return False
+                stack.extend(reversed(_symbols(expansion.push)))
+            elif top == lookahead:
+                position += 1
+                lookahead = string[position] if position < len(string) \
+                        else END
+            else:
+                return False
+        return position == len(string) + 1
+
+    def __str__(self):
+        string = 'Table:'
+        for key in sorted(self.table):
+            if key in self.conflicts:
+                continue
+            string += '\n(%s, %s) | %s' % (key[0], key[1], self.table[key])
+        for key in sorted(self.conflicts):
+            string += '\nConflict on (%s, %s):' % key
+            for expansion in self.conflicts[key]:
+                string += '\n    ' + str(expansion)
+        return string
+
+def first_sets(grammar):
+    """
+    Returns the nullable nonterminals of the grammar, and the FIRST set of
+    terminals of each nonterminal.
+    """
+    nullable = set()
+    first = dict((statement.left, set()) for statement in grammar.statements)
+    changed = True
+    while changed:
+        changed = False
+        for statement in grammar.statements:
+            symbols = _symbols(statement.right)
+            found = _first_of(symbols, nullable, first)
+            if not found <= first[statement.left]:
+                first[statement.left] |= found
+                changed = True
+            if statement.left not in nullable \
+                    and all(char in nullable for char in symbols):
+                nullable.add(statement.left)
+                changed = True
+    return nullable, first
+
+def follow_sets(grammar, nullable, first):
+    """
+    Returns the FOLLOW set of terminals of each nonterminal, with END for
+    the end of the input.
+    """
+    follow = dict((left, set()) for left in first)
+    if grammar.start in follow:
+        follow[grammar.start].add(END)
+    changed = True
+    while changed:
+        changed = False
+        for statement in grammar.statements:
+            trailer = set(follow[statement.left])
+            for char in reversed(_symbols(statement.right)):
+                if char not in first:
+                    trailer = set([char])
+                    continue
+                if not trailer <= follow[char]:
+                    follow[char] |= trailer
+                    changed = True
+                if char in nullable:
+                    trailer = trailer | first[char]
+                else:
+                    trailer = set(first[char])
+    return follow
+
+def _symbols(right):
+    """
+    Returns the symbols of a right side, none for EPS.
+    """
+    return [char for char in right if char != EPS]
+
+def _first_of(symbols, nullable, first):
+    """
+    Returns the terminals that can start a string derived from the symbols.
+    """
+    found = set()
+    for char in symbols:
+        if char not in first:
+            found.add(char)
+            return found
+        found |= first[char]
+        if char not in nullable:
+            return found
+    return found
+
+if __name__ == "__main__":
+    main()
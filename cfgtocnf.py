@@ -4,44 +4,47 @@ This is a Python (2.7) implementation of the CFGtoCNF algorithm.
 Author: Wes Rupert
 """
 
-EPS = '-'
+from collections import deque
+
+from cfgutil import EPS, BaseGrammar, Symbols, remove_nullable, \
+        remove_units, rewrite
+
+CLASSIC = 'classic'
+BINARIZE_FIRST = 'binarize-first'
+
 ALPHABET = ('a', 'b', 'char', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', \
         'm', 'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z')
 
-class Statement:
+class Statement(object):
     """
     A statement in a context-free grammar.
+
+    The left side is a nonterminal id and the right side a tuple of symbol
+    ids, as interned by a Symbols table; terminal ids are negative.
     """
-    def __init__(self, left, right, alphabet):
+    __slots__ = ('left', 'right')
+
+    def __init__(self, left, right):
         self.left = left
         self.right = right
-        self.alphabet = alphabet
 
     def is_eps(self):
         """
-        Returns whether the statement has an epsilon in it.
+        Returns whether the statement is an epsilon statement.
         """
-        for char in self.right:
-            if char == EPS:
-                return True
-        return False
+        return not self.right
 
     def is_mixed(self):
         """
         Returns whether the statement has any terminals in it, and is not unit.
         """
-        if len(self.right) == 1:
-            return False
-        for char in self.right:
-            if char in self.alphabet:
-                return True
-        return False
+        return len(self.right) > 1 and min(self.right) < 0
 
     def is_unit(self):
         """
         Returns whether the statement has only a single rhs non-terminal.
         """
-        return len(self.right) == 1 and self.right[0] not in self.alphabet
+        return len(self.right) == 1 and self.right[0] >= 0
 
     def is_long(self):
         """
@@ -49,170 +52,200 @@ class Statement:
         """
         return len(self.right) > 2
 
+    def format(self, symbols):
+        """
+        Returns the statement written with the names in the symbol table.
+        """
+        return "%s -> %s" % (symbols.name(self.left), \
+                symbols.format(self.right))
+
     def __eq__(self, other):
         return self.left == other.left and self.right == other.right
 
+    def __ne__(self, other):
+        return not self == other
+
     def __hash__(self):
-        return hash(self.left) ^ hash(self.right)
+        return hash((self.left, self.right))
 
     def __str__(self):
         return "%s -> %s" % (self.left, self.right)
 
-class Grammar:
+class Grammar(BaseGrammar):
     """
     A context-free grammar.
     """
     def __init__(self, name, alphabet, *args):
+        BaseGrammar.__init__(self)
         self._char = 0
         self.name = name
         self.alphabet = alphabet
-        self.statements = set()
+        self.symbols = Symbols(alphabet)
         for arg in args:
-            self.statements.add(Statement(arg[0], arg[1], alphabet))
+            self.add(arg[0], arg[1])
+
+    def add(self, left, right):
+        """
+        Adds a statement to the grammar, given by symbol names.
+        """
+        statement = Statement(self.symbols.nonterminal(left), \
+                self.symbols.parse(right))
+        self.statements.add(statement)
+        return statement
+
+    def _fresh(self):
+        """
+        Returns the id of a new numbered nonterminal.
+        """
+        symbol, self._char = self.symbols.fresh(self._char)
+        return symbol
+
+    def size(self):
+        """
+        Returns the size of the grammar, the total length of its statements.
+        """
+        return sum(1 + len(statement.right) for statement in self.statements)
 
     def find(self, left, right):
         """
         Finds the matching statement in the grammar, if any.
         """
-        for statement in self.statements:
-            if statement.left == left and statement.right == right:
+        for statement in self.productions(left):
+            if statement.right == right:
                 return statement
         return None
 
-    def is_nullable(self, production):
-        """
-        Returns whether the production in the context is nullable.
-        """
-        for statement in self.statements:
-            if statement.left == production:
-                if statement.is_eps():
-                    return True
-                elif not statement.is_mixed():
-                    nullable = True
-                    for char in statement.right:
-                        nullable = nullable and self.is_nullable(char)
-                    if nullable:
-                        return True
-        return False
-
     def remove_eps(self):
         """
         Removes all epsilon transitions from the context.
         """
-        while True:
-            new_grammar = set()
-            to_remove = set()
-            for statement in self.statements:
-                for char in statement.right:
-                    if char not in self.alphabet and self.is_nullable(char):
-                        stmt = Statement(statement.left, \
-                                statement.right.replace(char, ''), \
-                                self.alphabet)
-                        if len(stmt.right) == 0:
-                            stmt.right = EPS
-                        new_grammar.add(stmt)
-                        to_remove.add(self.find(char, EPS))
-            for statement in self.statements:
-                if statement not in new_grammar and statement not in to_remove:
-                    new_grammar.add(statement)
-            if new_grammar == self.statements:
-                break
-            self.statements = new_grammar
+        remove_nullable(self.statements, set(self.nullable()), Statement)
 
     def remove_unit(self):
         """
         Removes all unit productions frm the grammar.
         """
-        while True:
-            new_grammar = set()
-            to_remove = set()
-            for statement in self.statements:
-                if not statement.is_unit():
-                    continue
-                for stmt in self.statements:
-                    if stmt.left == statement.right:
-                        new_grammar.add(Statement( \
-                                statement.left, \
-                                stmt.right, \
-                                self.alphabet))
-                to_remove.add(statement)
-            for statement in self.statements:
-                if statement not in new_grammar and statement not in to_remove:
-                    new_grammar.add(statement)
-            if new_grammar == self.statements:
-                break
-            self.statements = new_grammar
-
-    def remove_mixed(self):
+        self.statements = remove_units(self.statements, Statement)
+
+    def remove_mixed(self, shared = False):
         """
         Removes all mixed productions from the grammar.
+
+        If shared, each terminal gets a single wrapper nonterminal, instead
+        of one per occurrence.
         """
-        while True:
-            new_grammar = set()
-            to_remove = set()
-            for statement in self.statements:
-                if not statement.is_mixed():
-                    continue
-                for char in statement.right:
-                    if char not in self.alphabet:
-                        continue
-                    for stmt in self.statements:
-                        if stmt.left == statement.left and len(stmt.right) > 1:
-                            new_grammar.add(Statement( \
-                                    statement.left, \
-                                    stmt.right.replace(char, str(self._char)), \
-                                    self.alphabet))
-                    new_grammar.add(Statement( \
-                            str(self._char), \
-                            char, \
-                            self.alphabet))
-                    self._char += 1
-                to_remove.add(statement)
-            for statement in self.statements:
-                if statement not in new_grammar and statement not in to_remove:
-                    new_grammar.add(statement)
-            if new_grammar == self.statements:
-                break
-            self.statements = new_grammar
-
-    def remove_long(self):
+        wrappers = {}
+
+        def rule(statement):
+            """
+            Moves each terminal of a mixed statement into a new production.
+            """
+            if not statement.is_mixed():
+                return None
+            right = []
+            replacements = []
+            for char in statement.right:
+                if char < 0:
+                    helper = wrappers.get(char)
+                    if helper is None:
+                        helper = self._fresh()
+                        replacements.append(Statement(helper, (char,)))
+                        if shared:
+                            wrappers[char] = helper
+                    char = helper
+                right.append(char)
+            replacements.append(Statement(statement.left, tuple(right)))
+            return replacements
+        rewrite(self.statements, rule)
+
+    def remove_long(self, shared = False):
         """
         Removes all long productions from the grammar.
+
+        If shared, rules ending in the same symbols share the helper
+        nonterminals for that suffix, instead of each getting its own chain.
+        """
+        suffixes = {}
+
+        def rule(statement):
+            """
+            Splits the first symbol off a long statement.
+            """
+            if not statement.is_long():
+                return None
+            tail = statement.right[1:]
+            helper = suffixes.get(tail)
+            replacements = []
+            if helper is None:
+                helper = self._fresh()
+                replacements.append(Statement(helper, tail))
+                if shared:
+                    suffixes[tail] = helper
+            replacements.append(Statement(statement.left, \
+                    (statement.right[0], helper)))
+            return replacements
+        rewrite(self.statements, rule)
+
+    def merge_equivalent(self, start = 'S'):
         """
-        while True:
-            new_grammar = set()
-            to_remove = set()
-            for statement in self.statements:
-                if not statement.is_long():
-                    continue
-                new_grammar.add(Statement( \
-                        statement.left, \
-                        statement.right[0] + str(self._char), \
-                        self.alphabet))
-                for i in range(1, len(statement.right) - 2):
-                    new_grammar.add(Statement( \
-                            str(self._char),  \
-                            statement.right[i] + str(self._char + 1),  \
-                            self.alphabet))
-                    self._char += 1
-                new_grammar.add(Statement( \
-                        str(self._char),  \
-                        statement.right[-2:],  \
-                        self.alphabet))
-                self._char += 1
-                to_remove.add(statement)
-            for statement in self.statements:
-                if statement not in new_grammar and statement not in to_remove:
-                    new_grammar.add(statement)
-            if new_grammar == self.statements:
-                break
-            self.statements = new_grammar
+        Merges nonterminals with the same productions, until no two are
+        alike, and rewrites their uses to the survivor: the start symbol,
+        given by name, which is never merged away, or else the one interned
+        first. A nonterminal's uses of itself match the other's uses of
+        itself, so A -> aA and B -> aB merge too.
+
+        Returns the number of symbols and of statements eliminated.
+        """
+        start = self.symbols.ids.get(start)
+        statements = self.statements
+        size = len(statements)
+        owner = {}
+        key_of = {}
+        merged = 0
+        queue = deque(sorted(statements.by_left))
+        queued = set(queue)
+        while queue:
+            left = queue.popleft()
+            queued.discard(left)
+            key = key_of.pop(left, None)
+            if key is not None and owner.get(key) == left:
+                del owner[key]
+            if not self.productions(left):
+                continue
+            key = frozenset(tuple(None if char == left else char \
+                    for char in statement.right) \
+                    for statement in self.productions(left))
+            other = owner.get(key)
+            if other is None:
+                owner[key] = left
+                key_of[left] = key
+                continue
+            if start in (left, other):
+                survivor = start
+            else:
+                survivor = min(left, other)
+            gone = other if survivor == left else left
+            owner[key] = survivor
+            key_of[survivor] = key
+            key_of.pop(gone, None)
+            merged += 1
+            for statement in list(self.productions(gone)):
+                statements.discard(statement)
+            for statement in list(self.uses(gone)):
+                statements.discard(statement)
+                statements.add(Statement(statement.left, tuple( \
+                        survivor if char == gone else char \
+                        for char in statement.right)))
+                if statement.left not in queued:
+                    queue.append(statement.left)
+                    queued.add(statement.left)
+        return merged, size - len(statements)
 
     def __str__(self):
         string = self.name + ':'
         for statement in sorted( \
                 self.statements, \
-                key = str):
+                key = lambda statement: statement.format(self.symbols)):
             if self.is_nullable(statement.left):
                 string += '\nN'
             else:
@@ -229,15 +262,14 @@ class Grammar:
                 string += 'L|'
             else:
                 string += ' |'
-            string += str(statement)
+            string += statement.format(self.symbols)
         return string
 
 def main():
     """
     The main function. Converts a sample CFG.
     """
-    grammar = Grammar('Example', ALPHABET, \
-            ('S', 'aA'), \
+    rules = (('S', 'aA'), \
             ('A', 'B'), \
             ('A', 'CDCD'), \
             ('B', EPS), \
@@ -245,25 +277,57 @@ def main():
             ('C', 'BDD'), \
             ('D', 'b'), \
             ('D', EPS))
+    grammar = Grammar('Example', ALPHABET, *rules)
     print 'Converting the following to CNF. ' + str(grammar)
     cfgtocnf(grammar, logging = True)
+    print ''
+    print 'Converting it again, binarizing first, sharing helpers and ' \
+            'merging equivalent symbols.'
+    cfgtocnf(Grammar('Example', ALPHABET, *rules), logging = True, \
+            order = BINARIZE_FIRST, shared = True, merge = True)
 
-def cfgtocnf(grammar, logging = False):
+def cfgtocnf(grammar, logging = False, order = CLASSIC, shared = False, \
+        merge = False, start = 'S'):
     """
     Converts a given grammar to Chomsky Normal Form.
+
+    The CLASSIC order removes epsilons first, which can grow exponentially
+    with the length of the rules. BINARIZE_FIRST moves terminals out and
+    splits long rules before removing epsilons and units, which keeps the
+    output quadratic in the size of the grammar.
+
+    If shared, terminals and rule suffixes reuse the same helper
+    nonterminals across rules. If merge, nonterminals with the same
+    productions are merged afterwards, keeping the start symbol.
     """
-    grammar.remove_eps()
-    if logging:
-        print 'Removing Eps. ' + str(grammar)
-    grammar.remove_unit()
-    if logging:
-        print 'Removing Units. ' + str(grammar)
-    grammar.remove_mixed()
+    if order == BINARIZE_FIRST:
+        phases = (('Mixed', lambda: grammar.remove_mixed(shared)), \
+                ('Long', lambda: grammar.remove_long(shared)), \
+                ('Eps', grammar.remove_eps), \
+                ('Units', grammar.remove_unit))
+    else:
+        phases = (('Eps', grammar.remove_eps), \
+                ('Units', grammar.remove_unit), \
+                ('Mixed', lambda: grammar.remove_mixed(shared)), \
+                ('Long', lambda: grammar.remove_long(shared)))
     if logging:
-        print 'Removing Mixed. ' + str(grammar)
-    grammar.remove_long()
+        print 'Size: %d statements, %d symbols.' % ( \
+                len(grammar.statements), grammar.size())
+    for name, phase in phases:
+        phase()
+        if logging:
+            print 'Removing %s. ' % name + str(grammar)
+            print 'Size: %d statements, %d symbols.' % ( \
+                    len(grammar.statements), grammar.size())
+    if merge:
+        symbols, statements = grammar.merge_equivalent(start)
+        if logging:
+            print 'Merging Equivalent. ' + str(grammar)
+            print 'Merged away %d symbols and %d statements.' % ( \
+                    symbols, statements)
+            print 'Size: %d statements, %d symbols.' % ( \
+                    len(grammar.statements), grammar.size())
     if logging:
-        print 'Removing Long. ' + str(grammar)
         print 'Conversion complete.'
     return grammar
 
@@ -4,6 +4,8 @@ This is a Python (2.7) implementation of the CFGtoPDA algorithm.
 Author: Wes Rupert
 """
 
+from cfgutil import IndexedSet
+
 EPS = '-'
 ALPHABET = ('a', 'b', 'char', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', \
         'm', 'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z')
@@ -80,10 +82,12 @@ class Grammar:
                 string += '\n |' + str(statement)
         return string
 
-class PDAStatement:
+class PDAStatement(object):
     """
     A statement in a push-down automata.
     """
+    __slots__ = ('name', 'read', 'pop', 'goto', 'push')
+
     def __init__(self, name, read, pop, goto, push):
         self.name = name
         self.read = read
@@ -103,27 +107,73 @@ class PDAStatement:
         """
         return self.read == read
 
+    def __eq__(self, other):
+        return isinstance(other, PDAStatement) \
+                and self.get_value() == other.get_value()
+
+    def __ne__(self, other):
+        return not self == other
+
     def __hash__(self):
-        return hash(self.name)    \
-                ^ hash(self.read) \
-                ^ hash(self.pop)  \
-                ^ hash(self.goto) \
-                ^ hash(self.push)
+        return hash(self.get_value())
 
     def __str__(self):
         return "(%s, %s, %s), (%s, %s)" % ( \
                 self.name, self.read, self.pop, self.goto, self.push)
 
-class PDA:
+class TransitionSet(IndexedSet):
+    """
+    A set of PDA statements indexed for lookup.
+
+    Every change keeps by_key (each (name, read, pop) to its statements)
+    and names (each state to the number of statements leaving it) up to
+    date.
+    """
+    def __init__(self, statements = ()):
+        self.by_key = {}
+        self.names = {}
+        IndexedSet.__init__(self, statements)
+
+    def _added(self, statement):
+        """
+        Indexes a statement just added.
+        """
+        self.by_key.setdefault((statement.name, statement.read, \
+                statement.pop), []).append(statement)
+        self.names[statement.name] = self.names.get(statement.name, 0) + 1
+
+    def _discarded(self, statement):
+        """
+        Unindexes a statement just removed.
+        """
+        key = (statement.name, statement.read, statement.pop)
+        self.by_key[key].remove(statement)
+        if not self.by_key[key]:
+            del self.by_key[key]
+        self.names[statement.name] -= 1
+        if not self.names[statement.name]:
+            del self.names[statement.name]
+
+class PDA(object):
     """
     A push-down automata.
     """
     def __init__(self, name, *args):
         self.name = name
-        self.statements = set()
+        self.statements = TransitionSet()
         for arg in args:
             self.add(arg[0], arg[1], arg[2], arg[3], arg[4])
 
+    def _get_statements(self):
+        return self._statements
+
+    def _set_statements(self, statements):
+        if not isinstance(statements, TransitionSet):
+            statements = TransitionSet(statements)
+        self._statements = statements
+
+    statements = property(_get_statements, _set_statements)
+
     def add(self, name, read, pop, goto, push):
         """
         Adds a statement to the PDA.
@@ -131,14 +181,18 @@ class PDA:
         self.statements.add(PDAStatement( \
                 name, read, pop, goto, push))
 
+    def transitions(self, name, read, pop):
+        """
+        Returns the statements leaving the named node that read and pop the
+        given values, each of which may be EPS.
+        """
+        return self.statements.by_key.get((name, read, pop), ())
+
     def name_in(self, name):
         """
         Returns whether an node is in the PDA.
         """
-        for statement in self.statements:
-            if statement.name == name:
-                return True
-        return False
+        return name in self.statements.names
 
     def __str__(self):
         string = self.name + ':'
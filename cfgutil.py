@@ -0,0 +1,567 @@
+"""
+This is a Python (2.7) implementation of the pieces shared by the
+context-free grammar algorithms.
+
+Author: Wes Rupert
+"""
+
+EPS = '-'
+
+class Symbols(object):
+    """
+    A table interning grammar symbols as small integers.
+
+    Terminals get negative ids and nonterminals non-negative ones, so a
+    statement can tell them apart without the alphabet.
+    """
+    def __init__(self, alphabet):
+        self.ids = {}
+        self._terminals = []
+        self._nonterminals = []
+        self._lengths = set()
+        for name in alphabet:
+            self.terminal(name)
+
+    def terminal(self, name):
+        """
+        Returns the id of the terminal, interning it if new.
+        """
+        if name not in self.ids:
+            self.ids[name] = ~len(self._terminals)
+            self._terminals.append(name)
+            self._lengths.add(len(name))
+        return self.ids[name]
+
+    def nonterminal(self, name):
+        """
+        Returns the id of the nonterminal, interning it if new.
+        """
+        if name not in self.ids:
+            self.ids[name] = len(self._nonterminals)
+            self._nonterminals.append(name)
+        return self.ids[name]
+
+    def fresh(self, counter):
+        """
+        Interns a new nonterminal named by the first unused number from the
+        counter on, and returns its id and the next counter value.
+        """
+        while str(counter) in self.ids:
+            counter += 1
+        return self.nonterminal(str(counter)), counter + 1
+
+    def name(self, symbol):
+        """
+        Returns the name of the symbol id.
+        """
+        if symbol < 0:
+            return self._terminals[~symbol]
+        return self._nonterminals[symbol]
+
+    def parse(self, right):
+        """
+        Interns a right side, returning it as a tuple of ids.
+
+        A string is split into the longest terminals it starts with, and
+        single character nonterminals, with EPS for the empty string. Any
+        other sequence is taken as symbol names, all kept, so a terminal
+        named EPS survives; an empty sequence is the empty string.
+        """
+        if not isinstance(right, basestring):
+            return tuple(self.nonterminal(name) if name not in self.ids \
+                    else self.ids[name] for name in right)
+        symbols = []
+        lengths = sorted(self._lengths, reverse = True)
+        i = 0
+        while i < len(right):
+            for length in lengths:
+                name = right[i:i + length]
+                if len(name) == length and name in self.ids \
+                        and self.ids[name] < 0:
+                    break
+            else:
+                name = right[i]
+            if name != EPS:
+                symbols.append(self.ids[name] if name in self.ids \
+                        else self.nonterminal(name))
+            i += len(name)
+        return tuple(symbols)
+
+    def tokenize(self, string):
+        """
+        Splits a string into the longest terminals it starts with, returning
+        their ids, or None for a character that starts no terminal. Any
+        other sequence is taken as terminal names. Nothing is interned.
+        """
+        if not isinstance(string, basestring):
+            return [self.ids[name] if self.ids.get(name, 0) < 0 else None \
+                    for name in string]
+        tokens = []
+        lengths = sorted(self._lengths, reverse = True)
+        i = 0
+        while i < len(string):
+            for length in lengths:
+                name = string[i:i + length]
+                if len(name) == length and self.ids.get(name, 0) < 0:
+                    tokens.append(self.ids[name])
+                    i += length
+                    break
+            else:
+                tokens.append(None)
+                i += 1
+        return tokens
+
+    def format(self, right):
+        """
+        Returns the names of a right side, joined by spaces if any name is
+        longer than one character.
+        """
+        if not right:
+            return EPS
+        names = [self.name(symbol) for symbol in right]
+        if any(len(name) > 1 for name in names):
+            return ' '.join(names)
+        return ''.join(names)
+
+class IndexedSet(set):
+    """
+    A set that keeps indexes of its items up to date.
+
+    Every change goes through add or discard, which call the subclass's
+    _added and _discarded hooks for each item that actually goes in or out,
+    so the set operations below need no index upkeep of their own. The
+    operations that make a new set, such as copy and |, build it through
+    __init__, so it is indexed too. Subclasses set up their indexes before
+    calling __init__.
+    """
+    def __init__(self, items = ()):
+        set.__init__(self)
+        self.update(items)
+
+    def _added(self, item):
+        """
+        Indexes an item just added.
+        """
+
+    def _discarded(self, item):
+        """
+        Unindexes an item just removed.
+        """
+
+    def add(self, item):
+        """
+        Adds the item, if it is not already in the set.
+        """
+        if item not in self:
+            set.add(self, item)
+            self._added(item)
+
+    def discard(self, item):
+        """
+        Removes the item, if it is in the set.
+        """
+        if item in self:
+            set.discard(self, item)
+            self._discarded(item)
+
+    def remove(self, item):
+        """
+        Removes the item, which must be in the set.
+        """
+        if item not in self:
+            raise KeyError(item)
+        self.discard(item)
+
+    def pop(self):
+        """
+        Removes and returns an arbitrary item.
+        """
+        if not self:
+            raise KeyError('pop from an empty set')
+        item = next(iter(self))
+        self.discard(item)
+        return item
+
+    def clear(self):
+        """
+        Removes all the items.
+        """
+        for item in list(self):
+            self.discard(item)
+
+    def update(self, *others):
+        """
+        Adds all the items in the others.
+        """
+        for other in others:
+            for item in other:
+                self.add(item)
+
+    def difference_update(self, *others):
+        """
+        Removes all the items in the others.
+        """
+        for other in others:
+            for item in list(other):
+                self.discard(item)
+
+    def intersection_update(self, *others):
+        """
+        Keeps only the items found in all the others.
+        """
+        for other in others:
+            other = set(other)
+            for item in list(self):
+                if item not in other:
+                    self.discard(item)
+
+    def symmetric_difference_update(self, other):
+        """
+        Keeps the items found in exactly one of the sets.
+        """
+        for item in set(other):
+            if item in self:
+                self.discard(item)
+            else:
+                self.add(item)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+    def __iand__(self, other):
+        self.intersection_update(other)
+        return self
+
+    def __ixor__(self, other):
+        self.symmetric_difference_update(other)
+        return self
+
+    def copy(self):
+        """
+        Returns an indexed copy of the set.
+        """
+        return type(self)(self)
+
+    def union(self, *others):
+        """
+        Returns an indexed set of the items in the set or any of the others.
+        """
+        return type(self)(set(self).union(*others))
+
+    def intersection(self, *others):
+        """
+        Returns an indexed set of the items in the set and all the others.
+        """
+        return type(self)(set(self).intersection(*others))
+
+    def difference(self, *others):
+        """
+        Returns an indexed set of the items in the set but none of the
+        others.
+        """
+        return type(self)(set(self).difference(*others))
+
+    def symmetric_difference(self, other):
+        """
+        Returns an indexed set of the items in exactly one of the sets.
+        """
+        return type(self)(set(self).symmetric_difference(other))
+
+    def __or__(self, other):
+        if not isinstance(other, (set, frozenset)):
+            return NotImplemented
+        return self.union(other)
+
+    def __and__(self, other):
+        if not isinstance(other, (set, frozenset)):
+            return NotImplemented
+        return self.intersection(other)
+
+    def __sub__(self, other):
+        if not isinstance(other, (set, frozenset)):
+            return NotImplemented
+        return self.difference(other)
+
+    def __xor__(self, other):
+        if not isinstance(other, (set, frozenset)):
+            return NotImplemented
+        return self.symmetric_difference(other)
+
+    __ror__ = __or__
+    __rand__ = __and__
+    __rxor__ = __xor__
+
+    def __rsub__(self, other):
+        if not isinstance(other, (set, frozenset)):
+            return NotImplemented
+        return type(self)(set(other).difference(self))
+
+class StatementSet(IndexedSet):
+    """
+    A set of statements that counts its changes and indexes its symbols.
+
+    Every change keeps by_left (each left side to its statements) and
+    by_symbol (each right side symbol to the statements using it) up to
+    date. Caches built from the set can tell when they are stale by its
+    version.
+    """
+    def __init__(self, statements = ()):
+        self.version = 0
+        self.by_left = {}
+        self.by_symbol = {}
+        IndexedSet.__init__(self, statements)
+
+    def _added(self, statement):
+        """
+        Indexes a statement just added.
+        """
+        self.by_left.setdefault(statement.left, set()).add(statement)
+        for char in set(statement.right):
+            self.by_symbol.setdefault(char, set()).add(statement)
+        self.version += 1
+
+    def _discarded(self, statement):
+        """
+        Unindexes a statement just removed.
+        """
+        _unindex(self.by_left, statement.left, statement)
+        for char in set(statement.right):
+            _unindex(self.by_symbol, char, statement)
+        self.version += 1
+
+def _unindex(index, key, statement):
+    """
+    Removes the statement from the index entry, dropping the entry if empty.
+    """
+    entry = index[key]
+    entry.discard(statement)
+    if not entry:
+        del index[key]
+
+class BaseGrammar(object):
+    """
+    The parts shared by the context-free grammars: statements kept in a
+    StatementSet however they are assigned, lookups through its indexes,
+    and the nullable set, computed once per change to the statements.
+
+    Subclasses provide symbols, the Symbols table of their ids.
+    """
+    def __init__(self):
+        self.statements = StatementSet()
+        self._nullable = None
+        self._nullable_for = None
+        self._nullable_version = None
+
+    def _get_statements(self):
+        return self._statements
+
+    def _set_statements(self, statements):
+        if not isinstance(statements, StatementSet):
+            statements = StatementSet(statements)
+        self._statements = statements
+
+    statements = property(_get_statements, _set_statements)
+
+    def productions(self, left):
+        """
+        Returns the statements with the given left side.
+        """
+        return self.statements.by_left.get(left, ())
+
+    def uses(self, symbol):
+        """
+        Returns the statements whose right side uses the symbol.
+        """
+        return self.statements.by_symbol.get(symbol, ())
+
+    def is_nullable(self, production):
+        """
+        Returns whether the production, a name or id, is nullable.
+        """
+        if isinstance(production, basestring):
+            production = self.symbols.ids.get(production)
+        return production in self.nullable()
+
+    def nullable(self):
+        """
+        Returns the set of nullable production ids.
+
+        The set is computed once per change to the statements.
+        """
+        statements = self.statements
+        if self._nullable_for is not statements \
+                or self._nullable_version != statements.version:
+            self._nullable = deriving(statements, lambda char: True)
+            self._nullable_for = statements
+            self._nullable_version = statements.version
+        return self._nullable
+
+def components(graph):
+    """
+    Finds the strongly connected components of a graph, given as a dict from
+    each node to its successors, with Tarjan's algorithm.
+
+    Returns the components as lists, each after all the components it can
+    reach.
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    on_stack = set()
+    result = []
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph.get(root, ())))]
+        while work:
+            node, successors = work[-1]
+            for succ in successors:
+                if succ not in index:
+                    index[succ] = lowlink[succ] = len(index)
+                    stack.append(succ)
+                    on_stack.add(succ)
+                    work.append((succ, iter(graph.get(succ, ()))))
+                    break
+                elif succ in on_stack:
+                    lowlink[node] = min(lowlink[node], index[succ])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    result.append(component)
+    return result
+
+def remove_units(statements, statement_type):
+    """
+    Returns the statements with the unit productions taken out, and each
+    nonterminal given the non-unit productions of every nonterminal it
+    reaches through units.
+
+    The unit graph is built once and condensed into its strongly connected
+    components, so each cycle of units shares one closure, computed after
+    the closures of the components it reaches.
+    """
+    graph = {}
+    for statement in statements:
+        if statement.is_unit() and statement.right[0] != statement.left:
+            graph.setdefault(statement.left, set()).add(statement.right[0])
+    result = set(statement for statement in statements \
+            if not statement.is_unit())
+    rights = {}
+    for component in components(graph):
+        members = set(component)
+        closure = set()
+        for left in component:
+            for statement in statements.by_left.get(left, ()):
+                if not statement.is_unit():
+                    closure.add(statement.right)
+            for target in graph.get(left, ()):
+                if target not in members:
+                    closure |= rights[target]
+        for left in component:
+            rights[left] = closure
+            for right in closure:
+                result.add(statement_type(left, right))
+    return result
+
+def rewrite(statements, rule):
+    """
+    Applies a rewrite rule to a StatementSet, in place, until no statement
+    changes.
+
+    The rule takes one statement and returns None to keep it as is, or the
+    statements to replace it with, which may include itself. Only
+    statements new to the set are fed back to the rule, so after the first
+    sweep the work is proportional to the changes.
+    """
+    work = list(statements)
+    while work:
+        statement = work.pop()
+        if statement not in statements:
+            continue
+        replacements = rule(statement)
+        if replacements is None:
+            continue
+        keep = False
+        for new in replacements:
+            if new == statement:
+                keep = True
+            elif new not in statements:
+                statements.add(new)
+                work.append(new)
+        if not keep:
+            statements.discard(statement)
+    return statements
+
+def remove_nullable(statements, nullable, statement_type):
+    """
+    Removes the epsilon statements, in place, adding every variant of the
+    others that leaves out some of their nullable occurrences.
+
+    Each rewrite leaves out a single occurrence, and the variants are fed
+    back until none is new.
+    """
+    def rule(statement):
+        """
+        Drops an epsilon statement, or adds the variants one shorter.
+        """
+        if statement.is_eps():
+            return ()
+        right = statement.right
+        if len(right) == 1:
+            return None
+        variants = [statement_type(statement.left, right[:i] + right[i + 1:]) \
+                for i, char in enumerate(right) if char in nullable]
+        if not variants:
+            return None
+        return [statement] + variants
+    return rewrite(statements, rule)
+
+def deriving(statements, counted):
+    """
+    Returns the left sides of a StatementSet that derive a string of only
+    uncounted symbols, with a worklist fixpoint.
+
+    Each statement counts its symbols for which counted is true, less those
+    found so far, and its left side is found when the count reaches zero.
+    Counting every symbol finds the nullable nonterminals, and counting the
+    nonterminals those that generate a terminal string. The statements are
+    visited a constant number of times.
+    """
+    found = set()
+    queue = []
+    remaining = {}
+    for statement in statements:
+        count = sum(1 for char in statement.right if counted(char))
+        if count:
+            remaining[statement] = count
+        elif statement.left not in found:
+            found.add(statement.left)
+            queue.append(statement.left)
+    while queue:
+        char = queue.pop()
+        for statement in statements.by_symbol.get(char, ()):
+            if statement not in remaining:
+                continue
+            remaining[statement] -= statement.right.count(char)
+            if remaining[statement] == 0 and statement.left not in found:
+                found.add(statement.left)
+                queue.append(statement.left)
+    return found
@@ -0,0 +1,228 @@
+"""
+This is a Python (2.7) implementation of DFSM compilation to Python code.
+
+Author: Wes Rupert
+"""
+
+import errno
+import hashlib
+import os
+import random
+import stat
+import tempfile
+import time
+
+from mindfsm import HOPCROFT, NODES, dfa_from_nodes, mindfsm
+
+BRANCH_LIMIT = 16
+CACHE_DIR = os.path.join(tempfile.gettempdir(), 'dfacompile-%d' % os.getuid())
+INDENT = '    '
+
+_LOADED = {}
+
+def automaton_hash(dfa):
+    """
+    Returns a hex digest identifying the DFA's structure.
+    """
+    digest = hashlib.sha1()
+    digest.update(repr((dfa.labels, dfa.init, len(dfa), BRANCH_LIMIT)))
+    digest.update(dfa.transitions.tostring())
+    digest.update(str(dfa.finals))
+    return digest.hexdigest()
+
+def generate(dfa):
+    """
+    Generates the source of a function match(string) for the DFA.
+
+    Machines of up to BRANCH_LIMIT states become a chain of branches, one
+    per state; larger ones a tuple of per-state dicts from label to state.
+    """
+    finals = tuple(state for state in range(len(dfa)) if dfa.is_final(state))
+    if not len(dfa):
+        return 'def match(string):\n%sreturn False\n' % INDENT
+    if len(dfa) <= BRANCH_LIMIT:
+        return _generate_branches(dfa, finals)
+    return _generate_tables(dfa, finals)
+
+def _generate_branches(dfa, finals):
+    """
+    Generates a matcher with one branch per state.
+    """
+    lines = ['FINALS = %r' % (frozenset(finals),), \
+            '', \
+            'def match(string, finals = FINALS):', \
+            INDENT + 'state = %d' % dfa.init, \
+            INDENT + 'for char in string:']
+    for state in range(len(dfa)):
+        keyword = 'if' if state == 0 else 'elif'
+        lines.append(INDENT * 2 + '%s state == %d:' % (keyword, state))
+        first = True
+        for label in dfa.labels:
+            target = dfa.go_to(state, label)
+            if target is None:
+                continue
+            keyword = 'if' if first else 'elif'
+            first = False
+            lines.append(INDENT * 3 + '%s char == %r:' % (keyword, label))
+            lines.append(INDENT * 4 + 'state = %d' % target)
+        if first:
+            lines.append(INDENT * 3 + 'return False')
+        else:
+            lines.append(INDENT * 3 + 'else:')
+            lines.append(INDENT * 4 + 'return False')
+    lines.append(INDENT + 'return state in finals')
+    return '\n'.join(lines) + '\n'
+
+def _generate_tables(dfa, finals):
+    """
+    Generates a matcher that looks each state's successor up in a dict.
+    """
+    lines = ['TABLE = (']
+    for state in range(len(dfa)):
+        row = {}
+        for label in dfa.labels:
+            target = dfa.go_to(state, label)
+            if target is not None:
+                row[label] = target
+        lines.append(INDENT + '%r,' % row)
+    lines.append(')')
+    lines.append('FINALS = %r' % (frozenset(finals),))
+    lines.append('')
+    lines.append('def match(string, table = TABLE, finals = FINALS):')
+    lines.append(INDENT + 'state = %d' % dfa.init)
+    lines.append(INDENT + 'for char in string:')
+    lines.append(INDENT * 2 + 'state = table[state].get(char)')
+    lines.append(INDENT * 2 + 'if state is None:')
+    lines.append(INDENT * 3 + 'return False')
+    lines.append(INDENT + 'return state in finals')
+    return '\n'.join(lines) + '\n'
+
+def compile_dfa(dfa, cache_dir = CACHE_DIR):
+    """
+    Returns a compiled match(string) function for the DFA.
+
+    The generated source is cached on disk under the automaton's hash, so a
+    machine is only generated once. The cache directory is created private
+    to the current user, and neither it nor a cached file is trusted unless
+    the user owns it and no one else can write to it; an untrusted cache is
+    not used. Passing None as the cache_dir skips the disk cache.
+    """
+    key = automaton_hash(dfa)
+    if key in _LOADED:
+        return _LOADED[key]
+    if cache_dir is not None and not _private_dir(cache_dir):
+        cache_dir = None
+    source = None
+    path = '<dfa %s>' % key
+    if cache_dir is not None:
+        path = os.path.join(cache_dir, key + '.py')
+        source = _read_private(path)
+    if source is None:
+        source = generate(dfa)
+        if cache_dir is not None:
+            handle, temp = tempfile.mkstemp(suffix = '.tmp', dir = cache_dir)
+            try:
+                os.write(handle, source)
+            finally:
+                os.close(handle)
+            os.rename(temp, path)
+    namespace = {}
+    exec compile(source, path, 'exec') in namespace
+    _LOADED[key] = namespace['match']
+    return namespace['match']
+
+def _private_dir(path):
+    """
+    Creates the directory, accessible only to the current user, if missing.
+
+    Returns whether it is a real directory owned by the current user that no
+    one else can write to.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+    try:
+        os.mkdir(path, 0700)
+    except OSError as error:
+        if error.errno != errno.EEXIST:
+            raise
+    info = os.lstat(path)
+    return stat.S_ISDIR(info.st_mode) and info.st_uid == os.getuid() \
+            and not info.st_mode & 022
+
+def _read_private(path):
+    """
+    Returns the contents of the file, or None if it is missing, or is not a
+    regular file owned by the current user that no one else can write to.
+    """
+    try:
+        handle = os.open(path, os.O_RDONLY | getattr(os, 'O_NOFOLLOW', 0))
+    except OSError as error:
+        if error.errno in (errno.ENOENT, errno.ELOOP):
+            return None
+        raise
+    with os.fdopen(handle) as cached:
+        info = os.fstat(cached.fileno())
+        if not stat.S_ISREG(info.st_mode) or info.st_uid != os.getuid() \
+                or info.st_mode & 022:
+            return None
+        return cached.read()
+
+def match_nodes(nodes, string):
+    """
+    Returns whether the Node graph accepts the string, walking Node.go_to.
+    """
+    node = None
+    for node in nodes:
+        if node.init:
+            break
+    for char in string:
+        if node is None:
+            return False
+        node = node.go_to(char)
+    return node is not None and node.final
+
+def benchmark(dfa, strings, repeat = 3):
+    """
+    Times matching the strings on the Node graph and on the compiled code.
+
+    Returns the best times in seconds, as (graph, compiled).
+    """
+    nodes = dfa.to_nodes()
+    match = compile_dfa(dfa)
+    graph_time = compiled_time = None
+    for _ in range(repeat):
+        start = time.time()
+        for string in strings:
+            match_nodes(nodes, string)
+        elapsed = time.time() - start
+        if graph_time is None or elapsed < graph_time:
+            graph_time = elapsed
+        start = time.time()
+        for string in strings:
+            match(string)
+        elapsed = time.time() - start
+        if compiled_time is None or elapsed < compiled_time:
+            compiled_time = elapsed
+    return graph_time, compiled_time
+
+def main():
+    """
+    The main function. Compiles the minimized DFSM and benchmarks it.
+    """
+    minimized, _ = mindfsm(dfa_from_nodes(NODES, ('a', 'b')), \
+            method = HOPCROFT)
+    print 'Compiling the following DFSM:'
+    print minimized
+    print ''
+    print generate(minimized)
+    rand = random.Random(343)
+    strings = [''.join(rand.choice('ab') for _ in range(rand.randint(0, 20))) \
+            for _ in range(20000)]
+    graph_time, compiled_time = benchmark(minimized, strings)
+    print 'Matching %d strings:' % len(strings)
+    print 'Node graph: %.3fs' % graph_time
+    print 'Compiled:   %.3fs' % compiled_time
+
+if __name__ == "__main__":
+    main()
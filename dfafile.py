@@ -0,0 +1,287 @@
+"""
+This is a Python (2.7) implementation of a binary, memory-mappable DFSM file
+format.
+
+A file is laid out as:
+    header    magic 'DFSM', then little-endian uint32 version, states,
+              labels, int32 init, and uint32 alphabet table length
+    alphabet  the labels, UTF-8 encoded and NUL-separated, padded to a
+              multiple of four bytes
+    table     int32 transitions, states x labels, -1 for none
+    finals    one bit per state, LSB first
+
+DFSMs can also be read from a text edge list, one entry per line:
+    labels a b      the labels, before any edge
+    init 1          the initial state, the first one named by default
+    final 3 6       final states
+    1 a 2           an edge from a state to a state on a label
+States are named by any word but the keywords labels, init and final, which
+are rejected as state names. Blank lines and lines starting with '#' are
+skipped.
+
+Author: Wes Rupert
+"""
+
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+from mindfsm import DFA, HOPCROFT, NODES, dfa_from_nodes, mindfsm
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+COMMENT = '#'
+KEYWORDS = ('labels', 'init', 'final')
+MAGIC = 'DFSM'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIiI')
+INT32 = struct.Struct('<i')
+
+class _Int32View:
+    """
+    A read-only view of little-endian int32s in a buffer, without copying.
+    """
+    def __init__(self, buf, offset, count):
+        self._buf = buf
+        self._offset = offset
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('view index out of range')
+        return INT32.unpack_from(self._buf, self._offset + 4 * index)[0]
+
+    def tostring(self):
+        """
+        Returns the raw bytes of the view.
+        """
+        return self._buf[self._offset:self._offset + 4 * self._count]
+
+class _Names:
+    """
+    The default names of a mapped DFA's states, made on demand.
+    """
+    def __init__(self, count):
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._count:
+            raise IndexError('name index out of range')
+        return str(index)
+
+class MappedDFA(DFA):
+    """
+    A read-only DFA whose transition table lives in a memory-mapped file.
+
+    Opening does not read the table, and processes that map the same file
+    share its pages. It can be passed anywhere a DFA is expected.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, \
+                    access = mmap.ACCESS_READ)
+        magic, version, size, width, init, length = \
+                HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Not a version %d DFSM file: %s' % ( \
+                    VERSION, path))
+        offset = HEADER.size
+        table = self._map[offset:offset + length]
+        labels = table.split('\0') if width else []
+        DFA.__init__(self, labels, init)
+        offset += _align(length)
+        if numpy is not None:
+            self.transitions = numpy.frombuffer(self._map, \
+                    dtype = '<i4', count = size * width, offset = offset)
+        else:
+            self.transitions = _Int32View(self._map, offset, size * width)
+        offset += 4 * size * width
+        self.finals = bytearray(self._map[offset:offset + (size + 7) // 8])
+        self.names = _Names(size)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add_state(self, isfinal = False, name = None):
+        raise TypeError('A mapped DFA is read-only.')
+
+    def set_final(self, state, isfinal):
+        raise TypeError('A mapped DFA is read-only.')
+
+    def set(self, state, label, target):
+        raise TypeError('A mapped DFA is read-only.')
+
+    def close(self):
+        """
+        Unmaps the file.
+        """
+        self.transitions = None
+        self._map.close()
+
+def _align(length):
+    """
+    Rounds the length up to a multiple of four.
+    """
+    return (length + 3) & ~3
+
+def save(dfa, path):
+    """
+    Writes the DFA to the file in the binary format.
+    """
+    table = '\0'.join(label.encode('utf-8') if isinstance(label, unicode) \
+            else str(label) for label in dfa.labels)
+    with open(path, 'wb') as handle:
+        handle.write(HEADER.pack(MAGIC, VERSION, len(dfa), len(dfa.labels), \
+                dfa.init, len(table)))
+        handle.write(table)
+        handle.write('\0' * (_align(len(table)) - len(table)))
+        transitions = dfa.transitions
+        if isinstance(transitions, _Int32View):
+            handle.write(transitions.tostring())
+        elif numpy is not None and isinstance(transitions, numpy.ndarray):
+            handle.write(transitions.astype('<i4').tostring())
+        else:
+            if sys.byteorder != 'little':
+                transitions = transitions[:]
+                transitions.byteswap()
+            transitions.tofile(handle)
+        handle.write(str(dfa.finals[:(len(dfa) + 7) // 8]))
+
+def load(path):
+    """
+    Opens the DFA in the file without reading its transition table.
+    """
+    return MappedDFA(path)
+
+def read_edges(lines):
+    """
+    Yields each entry in the lines of a text edge list, one line at a time,
+    as ('labels', labels), ('init', state), ('final', states) or
+    ('edge', source, label, target). Keywords used as state names, and labels
+    after the first entry, are rejected with the line number.
+    """
+    started = False
+    for number, line in enumerate(lines, 1):
+        words = line.split()
+        if not words or words[0].startswith(COMMENT):
+            continue
+        if words[0] in KEYWORDS:
+            names = words[1:]
+        elif len(words) == 3:
+            names = words[::2]
+        else:
+            raise ValueError('Line %d: not an edge list entry: %s' % ( \
+                    number, line.strip()))
+        if words[0] != 'labels':
+            for name in names:
+                if name in KEYWORDS:
+                    raise ValueError('Line %d: %s is a keyword, not a state' \
+                            ' name: %s' % (number, name, line.strip()))
+        if words[0] == 'labels':
+            if started:
+                raise ValueError('Line %d: labels after the first entry: %s' \
+                        % (number, line.strip()))
+            yield 'labels', names
+        elif words[0] == 'init':
+            if len(names) != 1:
+                raise ValueError('Line %d: not one initial state: %s' % ( \
+                        number, line.strip()))
+            yield 'init', names[0]
+        elif words[0] == 'final':
+            yield 'final', names
+        else:
+            yield ('edge',) + tuple(words)
+        started = True
+
+def load_text(path):
+    """
+    Reads a DFA from a text edge list, a line at a time.
+    """
+    dfa = None
+    states = {}
+    init = None
+
+    def state(name):
+        """
+        Returns the id of the named state, adding it if new.
+        """
+        if name not in states:
+            states[name] = dfa.add_state(name = name)
+        return states[name]
+
+    with open(path) as handle:
+        for entry in read_edges(handle):
+            if entry[0] == 'labels':
+                if dfa is not None:
+                    raise ValueError('Labels given twice in %s' % path)
+                dfa = DFA(entry[1])
+                continue
+            if dfa is None:
+                raise ValueError('No labels before the edges in %s' % path)
+            if entry[0] == 'init':
+                init = state(entry[1])
+            elif entry[0] == 'final':
+                for name in entry[1]:
+                    dfa.set_final(state(name), True)
+            else:
+                _, source, label, target = entry
+                if label not in dfa.label_ids:
+                    raise ValueError('Unknown label %s in %s' % (label, path))
+                source = state(source)
+                old = dfa.go_to(source, label)
+                if old is not None and old != state(target):
+                    raise ValueError('Two edges from %s on %s in %s' % ( \
+                            dfa.names[source], label, path))
+                dfa.set(source, label, state(target))
+    if dfa is None:
+        dfa = DFA(())
+    if init is not None:
+        dfa.init = init
+    return dfa
+
+def main():
+    """
+    The main function. Saves the sample DFSM, then maps and minimizes it, and
+    reads it back from a text edge list.
+    """
+    path = os.path.join(tempfile.gettempdir(), 'sample.dfsm')
+    save(dfa_from_nodes(NODES, ('a', 'b')), path)
+    dfa = load(path)
+    print 'Loaded the following DFSM from %s:' % path
+    print dfa
+    minimized, _ = mindfsm(dfa, method = HOPCROFT)
+    print 'Minimized DFSM:'
+    print minimized
+    text = os.path.join(tempfile.gettempdir(), 'sample.edges')
+    with open(text, 'w') as handle:
+        handle.write('labels %s\n' % ' '.join(dfa.labels))
+        handle.write('init %s\n' % dfa.names[dfa.init])
+        handle.write('final %s\n' % ' '.join(dfa.names[state] \
+                for state in range(len(dfa)) if dfa.is_final(state)))
+        for state in range(len(dfa)):
+            for label in dfa.labels:
+                target = dfa.go_to(state, label)
+                if target is not None:
+                    handle.write('%s %s %s\n' % (dfa.names[state], label, \
+                            dfa.names[target]))
+    dfa.close()
+    print 'Read the following DFSM from %s:' % text
+    print load_text(text)
+
+if __name__ == "__main__":
+    main()
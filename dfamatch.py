@@ -0,0 +1,137 @@
+"""
+This is a Python (2.7) implementation of batched DFSM matching.
+
+Author: Wes Rupert
+"""
+
+from array import array
+from itertools import islice, izip
+
+from mindfsm import HOPCROFT, NODES, dfa_from_nodes, mindfsm
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+CHUNK = 4096
+
+class Matcher:
+    """
+    Runs many inputs through a DFA at once.
+
+    Inputs use two extra label ids: a padding symbol that leaves every state
+    in place, and an unknown symbol that goes to the dead state, -1, as a
+    missing transition does. Inputs padded to a common length can then
+    advance in lockstep, one gather per symbol. The DFA's own transitions
+    and finals are read in place, with no total table built, so a mapped
+    DFA is never copied; it must not change while the matcher is used.
+
+    Fields: dfa, labels, pad, unknown, init
+    """
+    def __init__(self, dfa):
+        self.dfa = dfa
+        self.labels = dict(dfa.label_ids)
+        self.pad = len(dfa.labels)
+        self.unknown = self.pad + 1
+        self.init = dfa.init if len(dfa) else -1
+        if numpy is not None:
+            transitions = dfa.transitions
+            if not isinstance(transitions, numpy.ndarray):
+                transitions = numpy.frombuffer(transitions, \
+                        dtype = numpy.int32)
+            self._transitions = transitions
+            self._finals = numpy.frombuffer(dfa.finals, dtype = numpy.uint8)
+
+    def encode(self, strings):
+        """
+        Encodes the strings as rows of label ids, padded to a common length.
+
+        Returns a NumPy array if NumPy is available, otherwise a list of
+        arrays.
+        """
+        strings = list(strings)
+        length = max([len(string) for string in strings] or [0])
+        rows = []
+        for string in strings:
+            row = array('i', [self.labels.get(char, self.unknown) \
+                    for char in string])
+            row.extend([self.pad] * (length - len(string)))
+            rows.append(row)
+        if numpy is not None:
+            return numpy.array(rows, dtype = numpy.int32) \
+                    .reshape(len(rows), length)
+        return rows
+
+    def match(self, inputs):
+        """
+        Returns whether the DFA accepts each input, as a NumPy bool array if
+        NumPy is available, otherwise a list of bools.
+
+        The inputs are a list of strings, or rows of label ids padded with
+        the pad id to a common length, such as a 2-D NumPy array.
+        """
+        if not len(inputs):
+            if numpy is not None:
+                return numpy.zeros(0, dtype = bool)
+            return []
+        if isinstance(inputs[0], basestring):
+            inputs = self.encode(inputs)
+        if numpy is not None:
+            symbols = numpy.asarray(inputs, dtype = numpy.int32)
+            states = numpy.empty(len(symbols), dtype = numpy.intp)
+            states.fill(self.init)
+            for col in range(symbols.shape[1]):
+                chars = symbols[:, col]
+                step = (states >= 0) & (chars < self.pad)
+                if step.any():
+                    found = self._transitions[numpy.where(step, \
+                            states * self.pad + chars, 0)]
+                else:
+                    found = states
+                states = numpy.where(step, found, \
+                        numpy.where(chars == self.pad, states, -1))
+            accepted = numpy.zeros(len(states), dtype = bool)
+            live = states >= 0
+            states = states[live]
+            accepted[live] = self._finals[states >> 3] >> (states & 7) & 1
+            return accepted
+        transitions = self.dfa.transitions
+        pad = self.pad
+        states = [self.init] * len(inputs)
+        for column in izip(*inputs):
+            states = [transitions[state * pad + char] \
+                    if state >= 0 and char < pad \
+                    else state if char == pad else -1 \
+                    for state, char in izip(states, column)]
+        return [state >= 0 and self.dfa.is_final(state) for state in states]
+
+    def stream(self, strings, chunk = CHUNK):
+        """
+        Yields whether the DFA accepts each string, matching them in chunks.
+
+        Only one chunk of strings is held in memory at a time.
+        """
+        strings = iter(strings)
+        while True:
+            batch = list(islice(strings, chunk))
+            if not batch:
+                return
+            for accepted in self.match(batch):
+                yield bool(accepted)
+
+def main():
+    """
+    The main function. Matches a few strings against the minimized DFSM.
+    """
+    minimized, _ = mindfsm(dfa_from_nodes(NODES, ('a', 'b')), \
+            method = HOPCROFT)
+    print 'Matching against the following DFSM:'
+    print minimized
+    strings = ['', 'a', 'b', 'ab', 'aa', 'ba', 'aab', 'abab', 'bb', 'c']
+    matcher = Matcher(minimized)
+    for string, accepted in izip(strings, matcher.match(strings)):
+        print '%-5s %s' % (repr(string), accepted)
+
+if __name__ == "__main__":
+    main()
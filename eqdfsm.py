@@ -0,0 +1,129 @@
+"""
+This is a Python (2.7) implementation of the Hopcroft-Karp DFSM equivalence
+algorithm.
+
+Author: Wes Rupert
+"""
+
+from collections import deque
+
+from mindfsm import DFA, NODES, dfa_from_nodes, mindfsm
+
+def main():
+    """
+    The main function. Compares the sample DFSM to its minimized form, and to
+    a changed copy of it.
+    """
+    minimized, _ = mindfsm(NODES, ('a', 'b'))
+    print 'Comparing the sample DFSM to its minimized form:'
+    print eqdfsm(NODES, minimized)
+    changed = dfa_from_nodes(NODES, ('a', 'b'))
+    changed.set_final(5, True)
+    print 'Comparing the sample DFSM to one with 6 final:'
+    print eqdfsm(NODES, changed)
+
+def eqdfsm(first, second, labels = None):
+    """
+    Checks whether two DFSMs accept the same language.
+
+    Each machine is a list of Nodes or a DFA. The labels default to all the
+    labels found in either machine; missing transitions reject. Pairs of
+    states are explored breadth-first and merged with union-find, so the
+    check runs in near-linear time.
+
+    Returns (True, None) if the languages are equal, otherwise False and a
+    counterexample string accepted by exactly one machine.
+    """
+    if labels is None:
+        labels = sorted(set(_labels(first)) | set(_labels(second)))
+    if not isinstance(first, DFA):
+        first = dfa_from_nodes(first, labels)
+    if not isinstance(second, DFA):
+        second = dfa_from_nodes(second, labels)
+    offset = len(first)
+    sink = offset + len(second)
+    parent = range(sink + 1)
+
+    def find(state):
+        """
+        Finds the representative of the state's class.
+        """
+        while parent[state] != state:
+            parent[state] = parent[parent[state]]
+            state = parent[state]
+        return state
+
+    def step(state, label):
+        """
+        Returns the successor of a combined state on the label.
+        """
+        if state == sink:
+            return sink
+        if state < offset:
+            target = _go_to(first, state, label)
+        else:
+            target = _go_to(second, state - offset, label)
+            if target is not None:
+                target += offset
+        if target is None:
+            return sink
+        return target
+
+    def final(state):
+        """
+        Returns whether a combined state is final.
+        """
+        if state == sink:
+            return False
+        if state < offset:
+            return first.is_final(state)
+        return second.is_final(state - offset)
+
+    start = (first.init if offset else sink, \
+            second.init + offset if len(second) else sink)
+    history = [(start, None, None)]
+    queue = deque([0])
+    parent[find(start[0])] = find(start[1])
+    while queue:
+        entry = queue.popleft()
+        left, right = history[entry][0]
+        if final(left) != final(right):
+            return False, _word(history, entry)
+        for label in labels:
+            pair = (step(left, label), step(right, label))
+            roots = (find(pair[0]), find(pair[1]))
+            if roots[0] != roots[1]:
+                parent[roots[0]] = roots[1]
+                history.append((pair, entry, label))
+                queue.append(len(history) - 1)
+    return True, None
+
+def _labels(machine):
+    """
+    Returns the labels used by a list of Nodes or a DFA.
+    """
+    if isinstance(machine, DFA):
+        return machine.labels
+    return [vertex.label for node in machine for vertex in node.vertices]
+
+def _go_to(dfa, state, label):
+    """
+    Returns the destination of the state on the label, or None if the DFA
+    has no such transition or label.
+    """
+    if label not in dfa.label_ids:
+        return None
+    return dfa.go_to(state, label)
+
+def _word(history, entry):
+    """
+    Rebuilds the string leading to a history entry.
+    """
+    labels = []
+    while history[entry][1] is not None:
+        labels.append(history[entry][2])
+        entry = history[entry][1]
+    return ''.join(reversed(labels))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,418 @@
+"""
+This is a Python (2.7) implementation of incremental DFSM minimization.
+
+Author: Wes Rupert
+"""
+
+from array import array
+from collections import deque
+
+from mindfsm import DFA, HOPCROFT, NODES, dfa_from_nodes, mindfsm, \
+        _hopcroft, _quotient, _reachable, _restrict
+
+class IncrementalMinimizer:
+    """
+    Keeps the minimal partition of a DFA, and its quotient, up to date
+    across small edits.
+
+    Edits are recorded with set and set_final. On update, only the states
+    that can reach an edited state can have changed language; every other
+    class is left as it is. Each affected state first joins the unaffected
+    class it is equivalent to, if any, found through the quotient's inverse
+    transitions. The rest are refined among themselves, with each class
+    they lead to as a fixed block of its own, and the quotient is patched
+    for the classes that changed. If most states are affected, the machine
+    is minimized from scratch instead.
+
+    Refinement sends missing transitions to an implicit dead state, which
+    belongs to the dead class if there is one. The quotient itself takes
+    each class's transitions from its first state, as mindfsm does, so a
+    missing transition stays missing and the dead class stays a state
+    whenever some state of the DFA is in it.
+
+    Fields: dfa, block_of, blocks, quotient
+    """
+    def __init__(self, dfa, logging = False):
+        self.dfa = _restrict(dfa, range(len(dfa)))
+        self.logging = logging
+        self._width = width = len(dfa.labels)
+        self._sink = len(dfa)
+        self._inverse = [{} for _ in range(width)]
+        for state in range(len(dfa)):
+            for col in range(width):
+                self._inverse[col].setdefault(self._target(state, col), \
+                        set()).add(state)
+        self._rebuild()
+        self._edited = set()
+
+    def _rebuild(self):
+        """
+        Minimizes the whole machine from scratch, and builds its quotient.
+        """
+        width = self._width
+        classes = _hopcroft(self.dfa)
+        self.quotient, block_of = _quotient(self.dfa, classes)
+        self.block_of = array('i', block_of)
+        self.blocks = dict((num, set(block)) \
+                for num, block in enumerate(classes))
+        transitions = self.quotient.transitions
+        dead = None
+        for num in range(len(classes)):
+            if not self.quotient.is_final(num) and all(target < 0 \
+                    or target == num for target \
+                    in transitions[num * width:(num + 1) * width]):
+                dead = num
+        if dead is None:
+            dead = self.quotient.add_state(False, '')
+            self.blocks[dead] = set()
+        self.blocks[dead].add(self._sink)
+        self._sink_block = dead
+        self._succ = {}
+        self._preds = [{} for _ in range(width)]
+        for num in self.blocks:
+            succ = tuple(dead if target < 0 else target for target \
+                    in transitions[num * width:(num + 1) * width])
+            self._succ[num] = succ
+            for col, target in enumerate(succ):
+                self._preds[col].setdefault(target, set()).add(num)
+        self._free = []
+
+    def _target(self, state, col):
+        """
+        Returns the destination of the state on the label column, with the
+        implicit dead state for a missing transition.
+        """
+        if state == self._sink:
+            return state
+        target = self.dfa.transitions[state * self._width + col]
+        return self._sink if target < 0 else target
+
+    def _is_final(self, state):
+        """
+        Returns whether the state, or the implicit dead state, is final.
+        """
+        return state != self._sink and self.dfa.is_final(state)
+
+    def _block(self, state):
+        """
+        Returns the id of the block holding the state.
+        """
+        if state == self._sink:
+            return self._sink_block
+        return self.block_of[state]
+
+    def _assign(self, state, num):
+        """
+        Moves the state, which is in no block, into the block.
+        """
+        self.blocks[num].add(state)
+        if state == self._sink:
+            self._sink_block = num
+        else:
+            self.block_of[state] = num
+
+    def _new_block(self, states):
+        """
+        Adds a block holding the states, and returns its id. Ids of dropped
+        blocks are reused.
+        """
+        if self._free:
+            num = self._free.pop()
+        else:
+            num = self.quotient.add_state(False, '')
+        self.blocks[num] = set()
+        for state in states:
+            self._assign(state, num)
+        return num
+
+    def _drop(self, num):
+        """
+        Removes the empty block, freeing its id.
+        """
+        del self.blocks[num]
+        for col, target in enumerate(self._succ.pop(num, ())):
+            self._preds[col][target].discard(num)
+        self._free.append(num)
+
+    def _hidden(self, num):
+        """
+        Returns whether the block has no states of the DFA itself.
+        """
+        block = self.blocks.get(num)
+        return not block or len(block) == 1 and self._sink in block
+
+    def _patch(self, num):
+        """
+        Rebuilds the block's transitions between blocks, and its state in
+        the quotient.
+        """
+        width = self._width
+        quotient = self.quotient
+        block = self.blocks.get(num)
+        if block:
+            rep = min(block)
+            succ = tuple(self._block(self._target(rep, col)) \
+                    for col in range(width))
+            old = self._succ.get(num)
+            if old != succ:
+                for col in range(width):
+                    if old is not None:
+                        self._preds[col][old[col]].discard(num)
+                    self._preds[col].setdefault(succ[col], set()).add(num)
+                self._succ[num] = succ
+        if self._hidden(num):
+            quotient.names[num] = ''
+            quotient.set_final(num, False)
+            quotient.transitions[num * width:(num + 1) * width] = \
+                    array('i', [-1] * width)
+            return
+        quotient.names[num] = ','.join(self.dfa.names[state] \
+                for state in sorted(block) if state != self._sink)
+        quotient.set_final(num, self._is_final(rep))
+        for col in range(width):
+            target = self.dfa.transitions[rep * width + col]
+            quotient.transitions[num * width + col] = \
+                    self.block_of[target] if target >= 0 else -1
+
+    def set(self, state, label, target):
+        """
+        Retargets the transition from the state on the label.
+        """
+        col = self.dfa.label_ids[label]
+        self._inverse[col][self._target(state, col)].discard(state)
+        self.dfa.set(state, label, target)
+        self._inverse[col].setdefault(self._target(state, col), \
+                set()).add(state)
+        self._edited.add(state)
+
+    def set_final(self, state, isfinal):
+        """
+        Sets whether the state is final.
+        """
+        self.dfa.set_final(state, isfinal)
+        self._edited.add(state)
+
+    def _affected(self):
+        """
+        Returns the states that can reach an edited state.
+        """
+        seen = set(self._edited)
+        queue = deque(seen)
+        while queue:
+            state = queue.popleft()
+            for inv in self._inverse:
+                for source in inv.get(state, ()):
+                    if source not in seen:
+                        seen.add(source)
+                        queue.append(source)
+        return seen
+
+    def update(self):
+        """
+        Re-minimizes the machine after the recorded edits.
+
+        Returns the quotient DFA, with a state per block id, and the block
+        of each state. Ids of emptied blocks are left as unnamed states with
+        no transitions until reused, and unreachable blocks are kept; use
+        trimmed for a quotient like mindfsm's.
+        """
+        if self._edited:
+            affected = self._affected()
+            if 2 * len(affected) > len(self.dfa):
+                if self.logging:
+                    print 'Re-minimizing all %d states, %d affected.' % ( \
+                            len(self.dfa), len(affected))
+                self._rebuild()
+            else:
+                self._refine(affected)
+            self._edited = set()
+        return self.quotient, self.block_of
+
+    def _refine(self, affected):
+        """
+        Recomputes the classes of the affected states, and patches the
+        quotient for the blocks they leave and join.
+        """
+        dirty = set()
+        for state in affected:
+            num = self.block_of[state]
+            self.blocks[num].discard(state)
+            dirty.add(num)
+        for num in dirty:
+            if not self.blocks[num]:
+                self._drop(num)
+        matched = self._match(affected)
+        for state, num in matched.iteritems():
+            self._assign(state, num)
+            dirty.add(num)
+        rest = sorted(affected.difference(matched))
+        if rest:
+            for block in self._split(rest):
+                dirty.add(self._new_block(block))
+        if self.logging:
+            print 'Re-minimized %d affected states, %d into existing ' \
+                    'classes.' % (len(affected), len(matched))
+        for num in dirty:
+            self._patch(num)
+        self.quotient.init = self.block_of[self.dfa.init]
+
+    def _match(self, affected):
+        """
+        Returns the unaffected block each affected state is equivalent to,
+        for those that have one.
+
+        A state's candidates are the blocks leading where it leads on some
+        label, found through the quotient's inverse transitions, or derived
+        from a successor's candidates. Candidates are then dropped until
+        every one left leads to its successors' candidates.
+        """
+        width = self._width
+        candidates = {}
+        queue = deque()
+        for state in affected:
+            found = None
+            for col in range(width):
+                target = self._target(state, col)
+                if target not in affected:
+                    preds = self._preds[col].get(self._block(target), ())
+                    found = set(preds) if found is None \
+                            else found.intersection(preds)
+            if found is not None:
+                candidates[state] = self._same_final(state, found)
+                queue.append(state)
+        while queue:
+            state = queue.popleft()
+            for col, inv in enumerate(self._inverse):
+                for source in inv.get(state, ()):
+                    if source in affected and source not in candidates:
+                        found = set()
+                        for num in candidates[state]:
+                            found.update(self._preds[col].get(num, ()))
+                        candidates[source] = self._same_final(source, found)
+                        queue.append(source)
+        for state in affected:
+            if state not in candidates:
+                candidates[state] = self._same_final(state, self.blocks)
+        queue = deque(affected)
+        queued = set(affected)
+        while queue:
+            state = queue.popleft()
+            queued.discard(state)
+            kept = set(num for num in candidates[state] \
+                    if self._follows(state, num, affected, candidates))
+            if len(kept) < len(candidates[state]):
+                candidates[state] = kept
+                for inv in self._inverse:
+                    for source in inv.get(state, ()):
+                        if source in affected and source not in queued:
+                            queued.add(source)
+                            queue.append(source)
+        return dict((state, found.pop()) \
+                for state, found in candidates.iteritems() if found)
+
+    def _same_final(self, state, nums):
+        """
+        Returns the blocks among nums whose finality matches the state's.
+        """
+        isfinal = self._is_final(state)
+        return set(num for num in nums \
+                if self._is_final(min(self.blocks[num])) == isfinal)
+
+    def _follows(self, state, num, affected, candidates):
+        """
+        Returns whether the block leads, on every label, where the state
+        leads or to a candidate of the affected state it leads to.
+        """
+        succ = self._succ[num]
+        for col in range(self._width):
+            target = self._target(state, col)
+            if target in affected:
+                if succ[col] not in candidates[target]:
+                    return False
+            elif succ[col] != self._block(target):
+                return False
+        return True
+
+    def _split(self, states):
+        """
+        Returns the classes of the states, none of which is equivalent to a
+        block. Each block they lead to is a fixed singleton in the
+        refinement.
+        """
+        width = self._width
+        index = dict((state, i) for i, state in enumerate(states))
+        reduced = DFA(self.dfa.labels)
+        for state in states:
+            reduced.add_state(self._is_final(state))
+        fixed = {}
+        for i, state in enumerate(states):
+            for col in range(width):
+                target = self._target(state, col)
+                if target in index:
+                    target = index[target]
+                else:
+                    num = self._block(target)
+                    if num not in fixed:
+                        fixed[num] = reduced.add_state()
+                    target = fixed[num]
+                reduced.transitions[i * width + col] = target
+        finals = [i for i, state in enumerate(states) \
+                if self._is_final(state)]
+        others = [i for i, state in enumerate(states) \
+                if not self._is_final(state)]
+        initial = [finals, others] + [[i] for i in fixed.itervalues()]
+        return [[states[i] for i in block] for block \
+                in _hopcroft(reduced, initial = initial) \
+                if block[0] < len(states)]
+
+    def trimmed(self):
+        """
+        Returns the minimized DFA of the states reachable from the initial
+        state, and the new state of each old state, or -1 for unreachable
+        states, as mindfsm does for a DFA.
+
+        The current classes are reused, so no refinement is done.
+        """
+        reachable = _reachable(self.dfa)
+        index = dict((state, i) for i, state in enumerate(reachable))
+        groups = {}
+        for state in reachable:
+            groups.setdefault(self.block_of[state], []).append(index[state])
+        quotient, block_of = _quotient(_restrict(self.dfa, reachable), \
+                sorted(groups.itervalues()))
+        mapping = [-1] * len(self.dfa)
+        for new, old in enumerate(reachable):
+            mapping[old] = block_of[new]
+        return quotient, mapping
+
+def main():
+    """
+    The main function. Minimizes the sample DFSM, then edits it, checking
+    each result against mindfsm.
+    """
+    minimizer = IncrementalMinimizer(dfa_from_nodes(NODES, ('a', 'b')), \
+            logging = True)
+    print 'Minimized DFSM:'
+    _show(minimizer)
+    minimizer.set_final(5, True)
+    minimizer.update()
+    print 'After making 6 final:'
+    _show(minimizer)
+    minimizer.set(4, 'b', 1)
+    minimizer.update()
+    print 'After retargeting 5 on b to 2:'
+    _show(minimizer)
+
+def _show(minimizer):
+    """
+    Prints the minimizer's trimmed quotient, and whether it and the state
+    mapping agree with minimizing the edited DFA from scratch.
+    """
+    trimmed, mapping = minimizer.trimmed()
+    expected, expected_mapping = mindfsm(minimizer.dfa, method = HOPCROFT)
+    print trimmed
+    print 'Agrees with mindfsm: %s' % (str(trimmed) == str(expected) \
+            and mapping == expected_mapping)
+
+if __name__ == "__main__":
+    main()
@@ -4,152 +4,158 @@ This is a Python (2.7) implementation of the minCFG algorithm.
 Author: Wes Rupert
 """
 
-EPS = '-'
+from cfgutil import EPS, BaseGrammar, Symbols, deriving, \
+        remove_nullable, remove_units
+
 ALPHABET = ('a', 'b', 'char', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', \
         'm', 'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z')
 
-class Statement:
+class Statement(object):
     """
     A statement in a context-free grammar.
+
+    The left side is a nonterminal id and the right side a tuple of symbol
+    ids, as interned by a Symbols table; terminal ids are negative.
     """
-    def __init__(self, left, right, alphabet):
+    __slots__ = ('left', 'right')
+
+    def __init__(self, left, right):
         self.left = left
         self.right = right
-        self.alphabet = alphabet
 
     def is_eps(self):
         """
-        Returns whether the statement has an epsilon in it.
+        Returns whether the statement is an epsilon statement.
         """
-        for char in self.right:
-            if char == EPS:
-                return True
-        return False
+        return not self.right
 
     def is_unit(self):
         """
         Returns whether the statement has only a single rhs non-terminal.
         """
-        return len(self.right) == 1 and self.right[0] not in self.alphabet
+        return len(self.right) == 1 and self.right[0] >= 0
 
     def has_terminals(self):
         """
         Returns whether the statement has any terminals in it, and is not unit.
         """
-        if len(self.right) == 1:
-            return False
-        for char in self.right:
-            if char in self.alphabet:
-                return True
-        return False
+        return len(self.right) > 1 and min(self.right) < 0
+
+    def format(self, symbols):
+        """
+        Returns the statement written with the names in the symbol table.
+        """
+        return "%s -> %s" % (symbols.name(self.left), \
+                symbols.format(self.right))
 
     def __eq__(self, other):
         return self.left == other.left and self.right == other.right
 
+    def __ne__(self, other):
+        return not self == other
+
     def __hash__(self):
-        return hash(self.left) ^ hash(self.right)
+        return hash((self.left, self.right))
 
     def __str__(self):
         return "%s -> %s" % (self.left, self.right)
 
-class Grammar:
+class Grammar(BaseGrammar):
     """
     A context-free grammar.
     """
     def __init__(self, name, alphabet, *args):
+        BaseGrammar.__init__(self)
         self._char = 0
         self.name = name
         self.alphabet = alphabet
-        self.statements = set()
+        self.symbols = Symbols(alphabet)
         for arg in args:
-            self.statements.add(Statement(arg[0], arg[1], alphabet))
+            self.add(arg[0], arg[1])
+
+    def add(self, left, right):
+        """
+        Adds a statement to the grammar, given by symbol names.
+        """
+        statement = Statement(self.symbols.nonterminal(left), \
+                self.symbols.parse(right))
+        self.statements.add(statement)
+        return statement
 
     def find(self, left, right):
         """
         Finds the matching statement in the grammar, if any.
         """
-        for statement in self.statements:
-            if statement.left == left and statement.right == right:
+        for statement in self.productions(left):
+            if statement.right == right:
                 return statement
         return None
 
-    def is_nullable(self, production):
-        """
-        Returns whether the production in the context is nullable.
-        """
-        for statement in self.statements:
-            if statement.left == production:
-                if statement.is_eps():
-                    return True
-                elif not statement.has_terminals():
-                    nullable = True
-                    for char in statement.right:
-                        nullable = nullable and self.is_nullable(char)
-                    if nullable:
-                        return True
-        return False
-
     def remove_eps(self):
         """
         Removes all epsilon transitions from the context.
         """
-        while True:
-            new_grammar = set()
-            to_remove = set()
-            for statement in self.statements:
-                for char in statement.right:
-                    if char not in self.alphabet and self.is_nullable(char):
-                        stmt = Statement(statement.left, \
-                                statement.right.replace(char, ''), \
-                                self.alphabet)
-                        if len(stmt.right) == 0:
-                            stmt.right = EPS
-                        new_grammar.add(stmt)
-                        to_remove.add(self.find(char, EPS))
-            for statement in self.statements:
-                if statement not in new_grammar and statement not in to_remove:
-                    new_grammar.add(statement)
-            if new_grammar == self.statements:
-                break
-            self.statements = new_grammar
+        remove_nullable(self.statements, set(self.nullable()), Statement)
 
     def remove_unit(self):
         """
         Removes all unit productions frm the grammar.
         """
-        while True:
-            new_grammar = set()
-            to_remove = set()
-            for statement in self.statements:
-                if not statement.is_unit():
-                    continue
-                for stmt in self.statements:
-                    if stmt.left == statement.right:
-                        new_grammar.add(Statement( \
-                                statement.left, \
-                                stmt.right, \
-                                self.alphabet))
-                to_remove.add(statement)
-            for statement in self.statements:
-                if statement not in new_grammar and statement not in to_remove:
-                    new_grammar.add(statement)
-            if new_grammar == self.statements:
-                break
-            self.statements = new_grammar
+        self.statements = remove_units(self.statements, Statement)
+
+    def generating(self):
+        """
+        Returns the set of nonterminal ids that derive some terminal string.
+        """
+        return deriving(self.statements, lambda char: char >= 0)
+
+    def reachable(self, start):
+        """
+        Returns the set of nonterminal ids reachable from the start symbol,
+        given by name.
+        """
+        start = self.symbols.ids.get(start)
+        if start is None:
+            return set()
+        reachable = set([start])
+        queue = [start]
+        while queue:
+            left = queue.pop()
+            for statement in self.productions(left):
+                for char in statement.right:
+                    if char >= 0 and char not in reachable:
+                        reachable.add(char)
+                        queue.append(char)
+        return reachable
+
+    def remove_useless(self, start):
+        """
+        Removes the statements that use a nonterminal which derives no
+        terminal string, then those unreachable from the start symbol.
+        """
+        generating = self.generating()
+        for statement in list(self.statements):
+            if statement.left not in generating or any(char >= 0 \
+                    and char not in generating for char in statement.right):
+                self.statements.discard(statement)
+        reachable = self.reachable(start)
+        for statement in list(self.statements):
+            if statement.left not in reachable:
+                self.statements.discard(statement)
 
     def __str__(self):
         string = self.name + ':'
         for statement in sorted( \
                 self.statements, \
-                key = str):
+                key = lambda statement: statement.format(self.symbols)):
             if self.is_nullable(statement.left):
                 string += '\nN'
             else:
                 string += '\n '
             if statement.is_unit():
-                string += 'U|' + str(statement)
+                string += 'U|' + statement.format(self.symbols)
             else:
-                string += ' |' + str(statement)
+                string += ' |' + statement.format(self.symbols)
         return string
 
 def main():
@@ -166,18 +172,30 @@ def main():
             ('D', 'b'), \
             ('D', EPS))
     print 'Minimize the following. ' + str(grammar)
-    mincfg(grammar, logging = True)
+    mincfg(grammar, logging = True, start = 'S')
 
-def mincfg(grammar, logging = False):
+def mincfg(grammar, logging = False, start = None):
     """
     Minimizes a context-free grammar.
+
+    If a start symbol is given, useless symbols are removed before and
+    after the epsilon and unit productions.
     """
+    if start is not None:
+        grammar.remove_useless(start)
+        if logging:
+            print 'Removing Useless. ' + str(grammar)
     grammar.remove_eps()
     if logging:
         print 'Removing Eps. ' + str(grammar)
     grammar.remove_unit()
     if logging:
         print 'Removing Units. ' + str(grammar)
+    if start is not None:
+        grammar.remove_useless(start)
+        if logging:
+            print 'Removing Useless. ' + str(grammar)
+    if logging:
         print 'Minimization complete.'
     return grammar
 
@@ -4,7 +4,14 @@ This is a Python (2.7) implementation of the minDFSM algorithm.
 Author: Wes Rupert
 """
 
+from array import array
+from collections import deque
+
 INIT = '_'
+DEAD = 'dead'
+TABLE = 'table'
+HOPCROFT = 'hopcroft'
+WORKLIST = 'worklist'
 
 class Vertex:
     """
@@ -117,6 +124,123 @@ class Node:
             string += ', ' + str(vertex)
         return string
 
+class DFA:
+    """
+    A compact finite state machine.
+
+    States are dense integer ids. Transitions are kept in a single int32
+    array of size states x labels, with -1 for a missing transition, and
+    the final states in a bit-packed mask.
+
+    Fields: labels, names, init, transitions, finals
+    """
+    def __init__(self, labels, init = 0):
+        self.labels = tuple(labels)
+        self.label_ids = dict((label, i) for i, label in \
+                enumerate(self.labels))
+        self.names = []
+        self.init = init
+        self.transitions = array('i')
+        self.finals = bytearray()
+
+    def __len__(self):
+        return len(self.names)
+
+    def add_state(self, isfinal = False, name = None):
+        """
+        Adds a state with no transitions, and returns its id.
+        """
+        state = len(self.names)
+        if name is None:
+            name = str(state)
+        self.names.append(name)
+        self.transitions.extend([-1] * len(self.labels))
+        if state % 8 == 0:
+            self.finals.append(0)
+        self.set_final(state, isfinal)
+        return state
+
+    def set_final(self, state, isfinal):
+        """
+        Sets whether the state is final.
+        """
+        if isfinal:
+            self.finals[state >> 3] |= 1 << (state & 7)
+        else:
+            self.finals[state >> 3] &= ~(1 << (state & 7)) & 0xff
+
+    def is_final(self, state):
+        """
+        Returns whether the state is final.
+        """
+        return bool(self.finals[state >> 3] & (1 << (state & 7)))
+
+    def set(self, state, label, target):
+        """
+        Updates the transition from the state on the label.
+        """
+        if target is None:
+            target = -1
+        self.transitions[state * len(self.labels) \
+                + self.label_ids[label]] = target
+
+    def go_to(self, state, label):
+        """
+        Returns the destination of the state on the label, or None.
+        """
+        target = self.transitions[state * len(self.labels) \
+                + self.label_ids[label]]
+        if target < 0:
+            return None
+        return target
+
+    def to_nodes(self):
+        """
+        Converts the machine to a list of Nodes, in state order.
+        """
+        nodes = [Node(state == self.init, self.is_final(state), \
+                name = self.names[state]) for state in range(len(self))]
+        width = len(self.labels)
+        for state, node in enumerate(nodes):
+            for col, label in enumerate(self.labels):
+                target = self.transitions[state * width + col]
+                if target >= 0:
+                    node.add((label, nodes[target]))
+        return nodes
+
+    def __str__(self):
+        string = ''
+        for state in range(len(self)):
+            if state:
+                string += '\n'
+            string += '[%s%s] %s' % ( \
+                    'I' if state == self.init else '_', \
+                    'F' if self.is_final(state) else '_', \
+                    self.names[state])
+            for label in self.labels:
+                target = self.go_to(state, label)
+                if target is not None:
+                    string += ', %s -> %s' % (label, self.names[target])
+        return string
+
+def dfa_from_nodes(nodes, labels):
+    """
+    Converts a list of Nodes to a DFA.
+    """
+    dfa = DFA(labels)
+    index = {}
+    for node in nodes:
+        index[id(node)] = dfa.add_state(node.final, node.name)
+        if node.init:
+            dfa.init = index[id(node)]
+    for node in nodes:
+        for vertex in node.vertices:
+            if vertex.label in dfa.label_ids \
+                    and dfa.go_to(index[id(node)], vertex.label) is None:
+                dfa.set(index[id(node)], vertex.label, \
+                        index[id(vertex.target)])
+    return dfa
+
 NA = Node(True,  False, name = '1')
 NB = Node(False, True,  name = '2')
 NC = Node(False, False, name = '3')
@@ -143,122 +267,383 @@ def main():
     print NE
     print NF
     print ''
-    mindfsm(NODES, ('a', 'b'), logging = True)
+    minimized, _ = mindfsm(NODES, ('a', 'b'), logging = True)
+    print 'Minimized DFSM:'
+    for node in minimized:
+        print node
     return 0
 
-def mindfsm(nodes, labels, logging = False):
+def mindfsm(nodes, labels = None, logging = False, method = TABLE):
     """
     Minimizes the given DFSM.
+
+    The nodes are either a list of Nodes or a DFA, in which case the labels
+    default to its own. States unreachable from the initial state are
+    dropped before minimizing. The method is one of:
+        TABLE, the pairwise table-filling algorithm, in passes;
+        WORKLIST, table filling that propagates each marked pair backward
+            through the inverse transitions, in O(k n^2);
+        HOPCROFT, partition refinement, in O(k n log n).
+
+    Returns the minimized machine and a mapping from the index of each old
+    state to its new state, or None if it was unreachable. The machine is a
+    list of new Nodes, or a DFA (with -1 for unreachable) if given a DFA.
+    """
+    if method not in (TABLE, WORKLIST, HOPCROFT):
+        raise ValueError('Unknown minimization method: %s' % method)
+    compact = isinstance(nodes, DFA)
+    if compact:
+        dfa = nodes
+    else:
+        dfa = dfa_from_nodes(nodes, labels)
+    reachable = _reachable(dfa)
+    if len(reachable) == len(dfa):
+        trimmed = dfa
+    else:
+        trimmed = _restrict(dfa, reachable)
+    if method == HOPCROFT:
+        classes = _hopcroft(trimmed, logging)
+    elif method == WORKLIST:
+        classes = _worklist(trimmed, logging)
+    else:
+        graph = _complete(trimmed).to_nodes()
+        index = dict((id(node), i) for i, node in enumerate(graph))
+        classes = [[index[id(node)] for node in block \
+                if index[id(node)] < len(trimmed)] \
+                for block in _table(graph, trimmed.labels, logging)]
+        classes = [block for block in classes if block]
+    quotient, block_of = _quotient(trimmed, classes)
+    mapping = [-1] * len(dfa)
+    for new, old in enumerate(reachable):
+        mapping[old] = block_of[new]
+    if compact:
+        return quotient, mapping
+    graph = quotient.to_nodes()
+    return graph, [graph[state] if state >= 0 else None \
+            for state in mapping]
+
+def _reachable(dfa):
+    """
+    Returns the states reachable from the initial state, in state order.
+    """
+    if not len(dfa):
+        return []
+    width = len(dfa.labels)
+    seen = set([dfa.init])
+    queue = deque([dfa.init])
+    while queue:
+        state = queue.popleft()
+        for target in dfa.transitions[state * width:(state + 1) * width]:
+            if target >= 0 and target not in seen:
+                seen.add(target)
+                queue.append(target)
+    return sorted(seen)
+
+def _restrict(dfa, states):
+    """
+    Returns a copy of the DFA with only the given states, renumbered in order.
+
+    Transitions to dropped states are removed.
+    """
+    width = len(dfa.labels)
+    index = dict((state, i) for i, state in enumerate(states))
+    result = DFA(dfa.labels, index.get(dfa.init, 0))
+    for state in states:
+        result.add_state(dfa.is_final(state), dfa.names[state])
+    for new, state in enumerate(states):
+        for col in range(width):
+            target = dfa.transitions[state * width + col]
+            result.transitions[new * width + col] = index.get(target, -1)
+    return result
+
+def _complete(dfa):
+    """
+    Returns the DFA with its missing transitions sent to a new, non-final
+    dead state, or the DFA itself if it has none.
+    """
+    if -1 not in dfa.transitions:
+        return dfa
+    result = _restrict(dfa, range(len(dfa)))
+    dead = result.add_state(False, DEAD)
+    for i, target in enumerate(result.transitions):
+        if target < 0:
+            result.transitions[i] = dead
+    return result
+
+def _quotient(dfa, classes):
+    """
+    Merges each class of equivalent states into a single state.
+
+    Returns the merged DFA and the new state of each old state.
+    """
+    width = len(dfa.labels)
+    block_of = [-1] * len(dfa)
+    for num, block in enumerate(classes):
+        for state in block:
+            block_of[state] = num
+    result = DFA(dfa.labels)
+    if len(dfa):
+        result.init = block_of[dfa.init]
+    for block in classes:
+        result.add_state(dfa.is_final(block[0]), \
+                ','.join(dfa.names[state] for state in block))
+    for num, block in enumerate(classes):
+        for col in range(width):
+            target = dfa.transitions[block[0] * width + col]
+            if target >= 0:
+                result.transitions[num * width + col] = block_of[target]
+    return result, block_of
+
+def _table(nodes, labels, logging = False):
+    """
+    Minimizes the given list of Nodes by table filling, in passes.
+
+    Returns the equivalence classes as lists of nodes.
     """
     names = [node.name for node in nodes]
+    size = len(nodes)
+    index = dict((id(node), i) for i, node in enumerate(nodes))
     num_passes = 0
-    old_grid = None
-    grid = _init_grid(names)
-    for row in range(len(names)):
-        for col in range(row + 1, len(names)):
+    grid = _init_grid(size)
+    for row in range(size):
+        for col in range(row + 1, size):
             if not nodes[row].similar(nodes[col]):
-                grid[names[row]][names[col]] = False
-    while (old_grid != grid):
+                _mark_cell(grid, size, row, col)
+    changed = True
+    while changed:
+        changed = False
         num_passes += 1
         if logging:
             print 'STARTING PASS %d\n' % num_passes
-        old_grid = grid
-        grid = _copy_grid(old_grid)
-        if logging:
-            _print_grid(grid)
+            _print_grid(grid, names)
         table = {INIT : []}
         for label in labels:
             table[label] = []
-        for row in range(len(names)):
-            for col in range(row + 1, len(names)):
-                if grid[names[row]][names[col]]:
+        for row in range(size):
+            for col in range(row + 1, size):
+                if _is_cell_set(grid, size, row, col):
                     table[INIT].append((nodes[row], nodes[col]))
                     for label in labels:
                         gos = (nodes[row].go_to(label), nodes[col].go_to(label))
                         table[label].append(gos)
-                        grid[names[row]][names[col]] = \
-                                grid[names[row]][names[col]] and \
-                                (_is_cell_set(grid, gos[0].name, gos[1].name) \
-                                or gos[0] == gos[1])
+                        if not _is_cell_set(grid, size, \
+                                index[id(gos[0])], index[id(gos[1])]) \
+                                and _is_cell_set(grid, size, row, col):
+                            _mark_cell(grid, size, row, col)
+                            changed = True
         if logging:
             print '\nEND OF PASS %d\n' % num_passes
             _print_table(table)
             print ''
+    return _grid_classes(nodes, grid)
 
-def _copy_grid(grid):
+def _grid_classes(nodes, grid):
     """
-    Copies the grid.
+    Collects the equivalence classes left unmarked in the grid.
     """
-    new_grid = dict(grid)
-    for key in grid.keys():
-        new_grid[key] = dict(grid[key])
-    return new_grid
+    size = len(nodes)
+    classes = []
+    done = set()
+    for row in range(size):
+        if row in done:
+            continue
+        curr = [nodes[row]]
+        for col in range(row + 1, size):
+            if col not in done and _is_cell_set(grid, size, row, col):
+                curr.append(nodes[col])
+                done.add(col)
+        classes.append(curr)
+    return classes
 
-def _init_grid(labels):
+def _init_grid(size):
     """
     Creates a new minDFSM grid.
 
-    Grid is of the form:
-        T T T T T
-        X T T T T
-        X X T T T
-        X X X T T
-        X X X X T
-    """
-    grid = {}
-    donelabels = []
-    for row in labels:
-        curr = {}
-        for col in labels:
-            if col not in donelabels:
-                curr[col] = True
-            else:
-                curr[col] = None
-        grid[row] = curr
-        donelabels.append(row)
-    return grid
-
-def _grid_eq(grid1, grid2):
-    """
-    Checks if two grids are equal.
-    """
-    if grid1 is None or grid2 is None:
-        return False
-    if len(grid1) is not len(grid2) or len(grid1[0]) is not len(grid2[0]):
-        return False
-    for row in range(len(grid1)):
-        for col in range(row, len(grid1)):
-            if grid1[row][col] is not grid2[row][col]:
-                return False
-    return True
+    The grid is the strict upper triangle of the pair table, packed one bit
+    per pair in row order. A set bit marks the pair as distinguishable.
+    """
+    return bytearray((size * (size - 1) // 2 + 7) // 8)
+
+def _cell_index(size, row, col):
+    """
+    Returns the bit index of the pair in the grid.
+    """
+    if row > col:
+        row, col = col, row
+    return row * (2 * size - row - 1) // 2 + col - row - 1
+
+def _mark_cell(grid, size, row, col):
+    """
+    Marks the pair as distinguishable.
+    """
+    bit = _cell_index(size, row, col)
+    grid[bit >> 3] |= 1 << (bit & 7)
 
-def _is_cell_set(grid, row, col):
+def _is_cell_set(grid, size, row, col):
     """
-    Returns true if the cell is not False, otherwise False.
+    Returns true if the pair is not marked distinguishable, otherwise False.
     """
-    if grid[row][col] is None:
-        return grid[col][row]
-    return grid[row][col]
+    if row == col:
+        return True
+    bit = _cell_index(size, row, col)
+    return not grid[bit >> 3] & (1 << (bit & 7))
 
-def _print_grid(grid):
+def _print_grid(grid, names):
     """
     Prints the grid.
     """
+    size = len(names)
     string = '___'
-    for key in sorted(grid.keys()):
-        string += '_' + key + '_'
+    for name in names:
+        string += '_' + name + '_'
     print string
-    for key, val in sorted(grid.iteritems()):
-        string = key + ' |'
-        for i in sorted(grid.keys()):
-            if val[i] is None:
+    for row in range(size):
+        string = names[row] + ' |'
+        for col in range(size):
+            if col < row:
                 string += ' - '
-            elif val[i]:
+            elif _is_cell_set(grid, size, row, col):
                 string += '   '
             else:
                 string += ' X '
         print string
 
+def _inverse(dfa):
+    """
+    Returns the inverse transitions of the DFA, per label and target.
+
+    Missing transitions are sent to an implicit dead state, numbered
+    len(dfa), which loops to itself.
+    """
+    size = len(dfa)
+    width = len(dfa.labels)
+    inverse = []
+    for col in range(width):
+        inv = [[] for _ in range(size + 1)]
+        for state in range(size):
+            target = dfa.transitions[state * width + col]
+            if target < 0:
+                inv[size].append(state)
+            else:
+                inv[target].append(state)
+        inv[size].append(size)
+        inverse.append(inv)
+    return inverse
+
+def _worklist(dfa, logging = False):
+    """
+    Minimizes the given DFA by worklist-driven table filling.
+
+    Each marked pair is queued once and marks every unmarked pair of its
+    predecessors on the same label, so no pass is repeated.
+    """
+    size = len(dfa) + 1
+    inverse = _inverse(dfa)
+    grid = _init_grid(size)
+    finals = [dfa.is_final(state) for state in range(size - 1)] + [False]
+    queue = deque()
+    for row in range(size):
+        for col in range(row + 1, size):
+            if finals[row] != finals[col]:
+                _mark_cell(grid, size, row, col)
+                queue.append((row, col))
+    while queue:
+        row, col = queue.popleft()
+        for inv in inverse:
+            for prow in inv[row]:
+                for pcol in inv[col]:
+                    if _is_cell_set(grid, size, prow, pcol):
+                        _mark_cell(grid, size, prow, pcol)
+                        queue.append((prow, pcol))
+    if logging:
+        _print_grid(grid, [dfa.names[i] for i in range(len(dfa))] + [DEAD])
+    classes = _grid_classes(range(size), grid)
+    classes = [[state for state in block if state != size - 1] \
+            for block in classes]
+    return [block for block in classes if block]
+
+def _hopcroft(dfa, logging = False, initial = None):
+    """
+    Minimizes the given DFA by Hopcroft's partition refinement.
+
+    If initial blocks of states are given, refinement starts from them, with
+    the sink in a block of its own, instead of from the final and other
+    states.
+    """
+    size = len(dfa)
+    width = len(dfa.labels)
+    sink = size
+    inverse = _inverse(dfa)
+    if initial is None:
+        finals = set(state for state in range(size) if dfa.is_final(state))
+        others = set(range(size + 1)) - finals
+        blocks = [block for block in (finals, others) if block]
+    else:
+        blocks = [set(block) for block in initial if block] + [set([sink])]
+    block_of = [0] * (size + 1)
+    for num, block in enumerate(blocks):
+        for state in block:
+            block_of[state] = num
+    waiting = []
+    queued = set()
+    if initial is not None:
+        for num in range(len(blocks)):
+            for col in range(width):
+                waiting.append((num, col))
+                queued.add((num, col))
+    elif len(blocks) == 2:
+        smaller = 0 if len(blocks[0]) <= len(blocks[1]) else 1
+        for col in range(width):
+            waiting.append((smaller, col))
+            queued.add((smaller, col))
+    while waiting:
+        splitter = waiting.pop()
+        queued.discard(splitter)
+        num, col = splitter
+        inv = inverse[col]
+        touched = {}
+        count = len(blocks)
+        for target in blocks[num]:
+            for source in inv[target]:
+                touched.setdefault(block_of[source], set()).add(source)
+        for old, inside in touched.iteritems():
+            block = blocks[old]
+            if len(inside) == len(block):
+                continue
+            if 2 * len(inside) <= len(block):
+                block -= inside
+                split = inside
+            else:
+                split = block - inside
+                block &= inside
+            new = len(blocks)
+            blocks.append(split)
+            for state in split:
+                block_of[state] = new
+            for other in range(width):
+                if (old, other) in queued or len(split) <= len(block):
+                    add = (new, other)
+                else:
+                    add = (old, other)
+                waiting.append(add)
+                queued.add(add)
+        if logging and len(blocks) != count:
+            _print_partition(dfa, blocks)
+    classes = [[state for state in sorted(block) if state != sink] \
+            for block in blocks]
+    return sorted(block for block in classes if block)
+
+def _print_partition(dfa, blocks):
+    """
+    Prints the current partition.
+    """
+    string = ''
+    for block in blocks:
+        names = [dfa.names[i] if i < len(dfa) else DEAD \
+                for i in sorted(block)]
+        string += '{%s} ' % ', '.join(names)
+    print string
+
 def _print_table(table):
     """
     Prints the table.
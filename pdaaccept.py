@@ -0,0 +1,127 @@
+"""
+This is a Python (2.7) implementation of PDA acceptance over a
+graph-structured stack.
+
+Author: Wes Rupert
+"""
+
+from collections import deque
+
+from cfgtopda import ALPHABET, EPS, Grammar, cfgtopda
+
+class StackNode:
+    """
+    A node of a graph-structured stack.
+
+    Stacks that share a suffix share its nodes, and a node can have several
+    nodes below it, so one node stands for every stack it tops. Pops holds
+    the (statement, position) of each transition that popped the node, to
+    be replayed when a new node is linked below it.
+
+    Fields: symbol, below, pops
+    """
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.below = set()
+        self.pops = set()
+
+def pdaaccept(pda, string, start = 'p', finals = ('q',), empty_stack = True, \
+        logging = False):
+    """
+    Returns whether the PDA accepts the string, starting in the start state
+    with an empty stack and ending in a final state, with an empty stack if
+    empty_stack is set.
+
+    Reads, pops and pushes are strings of one-character symbols, or EPS.
+    Configurations (state, position, stack node) are explored breadth-first
+    and each is visited once. Nodes pushed by a transition at a position
+    are shared, so a loop of epsilon moves that keeps pushing closes into a
+    cycle of nodes instead of growing the stack forever, and the search
+    takes polynomial time in the length of the string. Each step looks up
+    only the statements matching its state, input symbol and stack top.
+    """
+    size = len(string)
+    bottom = StackNode(None)
+    nodes = {}
+    seen = set()
+    queue = deque()
+
+    def visit(state, position, node):
+        """
+        Queues the configuration, if it has not been seen.
+        """
+        if (state, position, node) not in seen:
+            seen.add((state, position, node))
+            queue.append((state, position, node))
+
+    def push(statement, position, base):
+        """
+        Pushes the statement's symbols onto the base and goes to its state.
+        """
+        symbols = [char for char in statement.push if char != EPS]
+        below = base
+        for index in reversed(range(len(symbols))):
+            key = (statement, index, position)
+            node = nodes.get(key)
+            if node is None:
+                node = nodes[key] = StackNode(symbols[index])
+            if below not in node.below:
+                node.below.add(below)
+                for popped, after in list(node.pops):
+                    push(popped, after, below)
+            below = node
+        visit(statement.goto, position, below)
+
+    visit(start, 0, bottom)
+    while queue:
+        state, position, node = queue.popleft()
+        if state in finals and position == size \
+                and (node is bottom or not empty_stack):
+            if logging:
+                print 'Accepted after %d configurations.' % len(seen)
+            return True
+        reads = [(EPS, position)]
+        if position < size:
+            reads.append((string[position], position + 1))
+        pops = [EPS] if node is bottom else [EPS, node.symbol]
+        for read, after in reads:
+            for pop in pops:
+                for statement in pda.transitions(state, read, pop):
+                    if pop == EPS:
+                        push(statement, after, node)
+                        continue
+                    node.pops.add((statement, after))
+                    for below in list(node.below):
+                        push(statement, after, below)
+    if logging:
+        print 'Rejected after %d configurations.' % len(seen)
+    return False
+
+def main():
+    """
+    The main function. Runs strings through PDAs converted from sample CFGs.
+    """
+    grammar = Grammar('Example', ALPHABET, 'S', \
+            ('S', 'aA'),   \
+            ('A', 'B'),    \
+            ('A', 'CDCD'), \
+            ('B', EPS),    \
+            ('B', 'a'),    \
+            ('C', 'BDD'),  \
+            ('D', 'b'),    \
+            ('D', EPS))
+    pda = cfgtopda(grammar)
+    print 'Running strings through the following PDA. ' + str(pda)
+    for string in ['a', 'aa', 'ab', 'abb', 'aabbb', 'ba', 'ac']:
+        print '%-7s %s' % (repr(string), pdaaccept(pda, string))
+    pda = cfgtopda(Grammar('Balanced', ALPHABET, 'S', \
+            ('S', 'aSbS'), \
+            ('S', EPS)))
+    string = 'ab' * 500 + 'a' * 1000 + 'b' * 1000
+    print 'Running %d symbols through the PDA for S -> aSbS | -.' % \
+            len(string)
+    pdaaccept(pda, string, logging = True)
+    pdaaccept(pda, string + 'a', logging = True)
+
+if __name__ == "__main__":
+    main()